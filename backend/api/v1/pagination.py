@@ -0,0 +1,23 @@
+import base64
+import json
+from typing import Any, Callable
+
+
+def encode_cursor(*values) -> str:
+    """Непрозрачный курсор из ключа последней записи страницы"""
+
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *parsers: Callable[[Any], Any]) -> list:
+    """Ключ из курсора; parsers - преобразования для каждой его части"""
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (ValueError, TypeError, AttributeError, UnicodeDecodeError):
+        raise ValueError("Некорректный курсор")
@@ -0,0 +1,66 @@
+"""
+Ответы ручек кошельков без повторной валидации через response_model:
+данные собираются словарями и сразу кодируются в pydantic_core (Rust).
+По заголовку Accept внутренние клиенты могут получить application/msgpack.
+"""
+
+from typing import Any, Optional
+
+import msgpack
+from fastapi import Request, Response
+from pydantic_core import to_json, to_jsonable_python
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+_MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+
+def _media_ranges(accept: str) -> dict[str, float]:
+    ranges = {}
+    for part in accept.split(","):
+        media_type, *params = part.split(";")
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges[media_type.strip().lower()] = q
+    return ranges
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    Формат ответа по заголовку Accept. msgpack отдаётся, только если клиент
+    назвал его явно и не поставил application/json выше, иначе JSON.
+    """
+    if not accept or "msgpack" not in accept:
+        return JSON
+
+    ranges = _media_ranges(accept)
+    msgpack_q = max(ranges.get(media_type, 0.0) for media_type in _MSGPACK_TYPES)
+    if msgpack_q > 0 and msgpack_q >= ranges.get(JSON, 0.0):
+        return MSGPACK
+    return JSON
+
+
+def render(
+    request: Request,
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[dict[str, str]] = None,
+) -> Response:
+    media_type = negotiate(request.headers.get("accept"))
+    if media_type == MSGPACK:
+        body = msgpack.packb(to_jsonable_python(content))
+    else:
+        body = to_json(content)
+
+    response = Response(
+        body, status_code=status_code, headers=headers, media_type=media_type
+    )
+    response.headers["Vary"] = "Accept"
+    return response
@@ -1,34 +1,173 @@
+import csv
+import io
+import json
 import uuid
-from typing import List
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
 
-from database.db import get_db
-from database.queries.wallet import (add_wallet, get_wallet,
+from api.v1.pagination import decode_cursor, encode_cursor
+from api.v1.responses import render
+from database.batching import wallet_batcher
+from database.cache import balance_cache
+from database.db import get_db, get_read_db
+from database.exceptions import (IdempotencyKeyInUseError, RecordLockedError,
+                                 StatementTimeoutError)
+from database.locking import lock_contention, row_locks
+from database.models.wallet import Wallet
+from database.queries.idempotency import get_idempotency_key
+from database.queries.operation import get_operations_page
+from database.queries.wallet import (MAX_BALANCE, add_wallet, add_wallets,
+                                     apply_wallet_operations, get_wallet,
+                                     get_wallet_page, stream_wallets,
                                      update_wallet_balance)
-from database.schemas.wallets import (OperationResponse, WalletBalanceResponse,
+from database.queries.wallet_stats import get_wallet_stats
+from database.schemas.wallets import (BalanceBucket, BalanceCacheStats,
+                                      BatchMode, BatchOperationRequest,
+                                      BatchOperationResponse,
+                                      BulkCreateRequest, ExportFormat,
+                                      OperationHistoryResponse,
+                                      OperationResponse, OperationType,
+                                      RowLockStats, WalletAggregates,
+                                      WalletBalanceResponse,
+                                      WalletListResponse, WalletLockContention,
                                       WalletOperation)
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (APIRouter, Depends, Header, HTTPException, Query, Request,
+                     Response, status)
+from fastapi.responses import StreamingResponse
+from settings import settings
 from sqlalchemy.ext.asyncio import AsyncSession
 
 wallets_router = APIRouter(prefix="/wallets", tags=["wallets"])
 
 
-@wallets_router.get("/", response_model=List[WalletBalanceResponse])
-async def get_wallet_list(db: AsyncSession = Depends(get_db)):
-    from database.models.wallet import Wallet
-    from sqlalchemy import select
+def _balance(wallet_uuid: uuid.UUID, balance: int) -> dict:
+    """WalletBalanceResponse без создания модели"""
 
-    result = await db.execute(select(Wallet))
-    wallets = result.scalars().all()
+    return {"wallet_id": wallet_uuid, "balance": balance}
 
+
+@wallets_router.get("/", response_model=WalletListResponse)
+async def get_wallet_list(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    min_balance: Optional[int] = None,
+    max_balance: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    after = None
+    if cursor is not None:
+        try:
+            (after,) = decode_cursor(cursor, uuid.UUID)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    rows = await get_wallet_page(db, limit, after, min_balance, max_balance)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(str(rows[-1].uuid))
+
+    return render(
+        request,
+        {
+            "items": [_balance(row.uuid, row.balance) for row in rows],
+            "next_cursor": next_cursor,
+        },
+    )
+
+
+async def _export_ndjson(db: AsyncSession) -> AsyncIterator[str]:
+    async for rows in stream_wallets(db):
+        yield "".join(
+            json.dumps({"wallet_id": str(row.uuid), "balance": row.balance}) + "\n"
+            for row in rows
+        )
+
+
+async def _export_csv(db: AsyncSession) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    writer.writerow(["wallet_id", "balance"])
+    yield buffer.getvalue()
+
+    async for rows in stream_wallets(db):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+@wallets_router.get("/export")
+async def export_wallets(
+    format: ExportFormat = ExportFormat.NDJSON, db: AsyncSession = Depends(get_db)
+):
+    """Выгрузка всех кошельков потоком, без загрузки таблицы в память"""
+
+    if format == ExportFormat.CSV:
+        return StreamingResponse(
+            _export_csv(db),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=wallets.csv"},
+        )
+
+    return StreamingResponse(_export_ndjson(db), media_type="application/x-ndjson")
+
+
+@wallets_router.get("/cache/stats", response_model=BalanceCacheStats)
+async def get_balance_cache_stats():
+    return BalanceCacheStats(enabled=settings.balance_cache, **balance_cache.stats())
+
+
+@wallets_router.get("/locks/stats", response_model=RowLockStats)
+async def get_row_lock_stats():
+    return RowLockStats(enabled=settings.row_lock_striping, **row_locks.stats())
+
+
+@wallets_router.get("/locks/hot", response_model=List[WalletLockContention])
+async def get_hot_wallets(limit: int = Query(10, ge=1, le=1000)):
     return [
-        WalletBalanceResponse(wallet_id=uuid.UUID(w.uuid), balance=w.balance)
-        for w in wallets
+        WalletLockContention(wallet_id=wallet_uuid, **vars(entry))
+        for wallet_uuid, entry in lock_contention.hottest(Wallet, limit)
     ]
 
 
+def _bucket_bounds(bucket: int) -> tuple[int, int]:
+    """Корзина - число цифр баланса, 0 - нулевой баланс"""
+
+    if bucket == 0:
+        return 0, 0
+    return 10 ** (bucket - 1), min(10**bucket - 1, MAX_BALANCE)
+
+
+@wallets_router.get("/aggregates", response_model=WalletAggregates)
+async def get_wallet_aggregates(db: AsyncSession = Depends(get_read_db)):
+    """Число кошельков, сумма балансов и распределение по корзинам без обхода wallets"""
+
+    buckets = []
+    for row in await get_wallet_stats(db):
+        min_balance, max_balance = _bucket_bounds(row.bucket)
+        buckets.append(
+            BalanceBucket(
+                min_balance=min_balance,
+                max_balance=max_balance,
+                wallets=row.wallets,
+                total=int(row.total),
+            )
+        )
+
+    return WalletAggregates(
+        wallets=sum(bucket.wallets for bucket in buckets),
+        total=sum(bucket.total for bucket in buckets),
+        buckets=buckets,
+    )
+
+
 @wallets_router.get("/{wallet_uuid}", response_model=WalletBalanceResponse)
 async def get_wallet_by_uuid(
-    wallet_uuid: uuid.UUID, db: AsyncSession = Depends(get_db)
+    wallet_uuid: uuid.UUID, request: Request, db: AsyncSession = Depends(get_read_db)
 ):
     wallet = await get_wallet(db, wallet_uuid)
     if not wallet:
@@ -36,8 +175,104 @@ async def get_wallet_by_uuid(
             status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found"
         )
 
-    return WalletBalanceResponse(
-        wallet_id=uuid.UUID(wallet.uuid), balance=wallet.balance
+    return render(request, _balance(wallet.uuid, wallet.balance))
+
+
+@wallets_router.get(
+    "/{wallet_uuid}/operations", response_model=OperationHistoryResponse
+)
+async def get_wallet_operations(
+    wallet_uuid: uuid.UUID,
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """История операций кошелька от новых к старым, страницами по курсору"""
+
+    before = None
+    if cursor is not None:
+        try:
+            before = tuple(decode_cursor(cursor, datetime.fromisoformat, int))
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    rows = await get_operations_page(db, wallet_uuid, limit, before)
+    if not rows and before is None and not await get_wallet(db, wallet_uuid):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found"
+        )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at.isoformat(), rows[-1].id)
+
+    return render(
+        request,
+        {
+            "items": [
+                {
+                    "id": row.id,
+                    "operation_type": row.operation_type,
+                    "amount": row.amount,
+                    "balance": row.balance,
+                    "created_at": row.created_at,
+                }
+                for row in rows
+            ],
+            "next_cursor": next_cursor,
+        },
+    )
+
+
+def _operation(
+    wallet_uuid: uuid.UUID,
+    operation_type: OperationType,
+    amount: int,
+    new_balance: Optional[int],
+) -> dict:
+    """OperationResponse без создания модели"""
+
+    return {
+        "wallet_id": wallet_uuid,
+        "operation_type": operation_type,
+        "amount": amount,
+        "new_balance": new_balance,
+        "status": "success",
+    }
+
+
+def _replay_operation(
+    record, wallet_uuid: uuid.UUID, operation: WalletOperation, request: Request
+) -> Response:
+    if (record.wallet_uuid, record.operation_type, record.amount) != (
+        wallet_uuid,
+        operation.operation_type,
+        operation.amount,
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="Ключ идемпотентности уже использован для другого запроса",
+        )
+
+    return render(
+        request,
+        _operation(
+            record.wallet_uuid,
+            record.operation_type,
+            record.amount,
+            record.new_balance,
+        ),
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def _retry_later(status_code: int, detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": str(settings.retry_after)},
     )
 
 
@@ -45,29 +280,130 @@ async def get_wallet_by_uuid(
 async def wallet_operation(
     wallet_uuid: uuid.UUID,
     operation: WalletOperation,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255),
     db: AsyncSession = Depends(get_db),
 ):
+    if idempotency_key is not None:
+        record = await get_idempotency_key(db, idempotency_key)
+        if record is not None:
+            return _replay_operation(record, wallet_uuid, operation, request)
+
     try:
-        wallet = await update_wallet_balance(
-            db, wallet_uuid, operation.operation_type, operation.amount
+        # Операции с ключом идемпотентности идут мимо group commit:
+        # ключ записывается в одной транзакции с изменением баланса
+        if settings.wallet_batching and idempotency_key is None:
+            wallet = await wallet_batcher.submit(
+                db, wallet_uuid, operation.operation_type, operation.amount
+            )
+        else:
+            wallet = await update_wallet_balance(
+                db,
+                wallet_uuid,
+                operation.operation_type,
+                operation.amount,
+                idempotency_key=idempotency_key,
+            )
+
+        return render(
+            request,
+            _operation(
+                wallet.uuid, operation.operation_type, operation.amount, wallet.balance
+            ),
         )
 
-        return OperationResponse(
-            wallet_id=uuid.UUID(wallet.uuid),
-            operation_type=operation.operation_type,
-            amount=operation.amount,
-            new_balance=wallet.balance,
+    except IdempotencyKeyInUseError:
+        record = await get_idempotency_key(db, idempotency_key)
+        return _replay_operation(record, wallet_uuid, operation, request)
+
+    except RecordLockedError:
+        raise _retry_later(status.HTTP_409_CONFLICT, "Кошелёк занят другой операцией")
+
+    except StatementTimeoutError:
+        raise _retry_later(
+            status.HTTP_503_SERVICE_UNAVAILABLE, "Операция не успела выполниться"
         )
 
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+def _batch_result(item, result) -> dict:
+    """BatchOperationResult без создания модели"""
+
+    if isinstance(result, ValueError):
+        return {
+            "wallet_id": item.wallet_id,
+            "operation_type": item.operation_type,
+            "amount": item.amount,
+            "new_balance": None,
+            "status": "error",
+            "detail": str(result),
+        }
+
+    return {
+        **_operation(item.wallet_id, item.operation_type, item.amount, result.balance),
+        "detail": None,
+    }
+
+
+@wallets_router.post("/operations:batch", response_model=BatchOperationResponse)
+async def wallet_operations_batch(
+    batch: BatchOperationRequest, request: Request, db: AsyncSession = Depends(get_db)
+):
+    operations = [
+        (item.wallet_id, item.operation_type, item.amount) for item in batch.operations
+    ]
+
+    try:
+        results = await apply_wallet_operations(
+            db, operations, atomic=batch.mode == BatchMode.ATOMIC
+        )
+    except RecordLockedError:
+        raise _retry_later(status.HTTP_409_CONFLICT, "Кошельки заняты другой операцией")
+    except StatementTimeoutError:
+        raise _retry_later(
+            status.HTTP_503_SERVICE_UNAVAILABLE, "Операция не успела выполниться"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return render(
+        request,
+        {
+            "results": [
+                _batch_result(item, result)
+                for item, result in zip(batch.operations, results)
+            ]
+        },
+    )
+
+
 @wallets_router.post("/", status_code=status.HTTP_201_CREATED)
-async def create_wallet(db: AsyncSession = Depends(get_db)):
+async def create_wallet(request: Request, db: AsyncSession = Depends(get_db)):
     new_uuid = uuid.uuid4()
     wallet = await add_wallet(db, new_uuid)
 
-    return WalletBalanceResponse(
-        wallet_id=uuid.UUID(wallet.uuid), balance=wallet.balance
+    return render(
+        request, _balance(wallet.uuid, wallet.balance), status.HTTP_201_CREATED
+    )
+
+
+@wallets_router.post(
+    "/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=List[WalletBalanceResponse],
+)
+async def create_wallets_bulk(
+    bulk: BulkCreateRequest, request: Request, db: AsyncSession = Depends(get_db)
+):
+    balances = bulk.balances or [0] * bulk.count
+    wallets = [(uuid.uuid4(), balance) for balance in balances]
+
+    await add_wallets(db, wallets)
+
+    return render(
+        request,
+        [_balance(wallet_uuid, balance) for wallet_uuid, balance in wallets],
+        status.HTTP_201_CREATED,
     )
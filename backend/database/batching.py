@@ -0,0 +1,136 @@
+import asyncio
+from dataclasses import dataclass, field
+from uuid import UUID
+
+from database.models.wallet import Wallet
+from settings import settings
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import balance_cache
+from .locking import acquire_lock
+from .queries.operation import record_operations
+from .queries.wallet import apply_operation
+
+
+@dataclass
+class _Batch:
+    items: list[tuple[str, int, asyncio.Future]] = field(default_factory=list)
+    full: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class WalletOperationBatcher:
+    """
+    Group commit для операций над одним кошельком.
+
+    Первый запрос к кошельку становится лидером: ждёт окно window,
+    собирая операции остальных запросов, затем под одной блокировкой
+    строки применяет их по порядку и делает один commit. Каждый запрос
+    получает свой результат: кошелёк с балансом после своей операции
+    или ошибку только своей операции.
+    """
+
+    def __init__(self, window: float, max_size: int):
+        self.window = window
+        self.max_size = max_size
+        self._pending: dict[UUID, _Batch] = {}
+        # Сколько пачек применено, каждая - одна транзакция
+        self.flushes = 0
+
+    async def submit(
+        self, db: AsyncSession, wallet_uuid: UUID, operation_type: str, amount: int
+    ) -> Wallet:
+        future = asyncio.get_running_loop().create_future()
+
+        batch = self._pending.get(wallet_uuid)
+        if batch is not None:
+            batch.items.append((operation_type, amount, future))
+            if len(batch.items) >= self.max_size:
+                self._detach(wallet_uuid, batch)
+            return await future
+
+        batch = self._pending[wallet_uuid] = _Batch()
+        batch.items.append((operation_type, amount, future))
+
+        # Пачка выполняется в своей задаче: отмена лидера (клиент отключился)
+        # не прерывает commit чужих операций. Сессия лидера нужна пачке до
+        # конца, поэтому лидер дожидается задачи и только потом отменяется.
+        run = asyncio.ensure_future(self._run(db, wallet_uuid, batch))
+        cancelled = None
+        while not run.done():
+            try:
+                await asyncio.shield(run)
+            except asyncio.CancelledError as e:
+                # Как и у отменённых ведомых, операция лидера не применится,
+                # если пачка ещё не взяла блокировку
+                future.cancel()
+                cancelled = e
+        if cancelled is not None:
+            raise cancelled
+
+        return await future
+
+    async def _run(self, db: AsyncSession, wallet_uuid: UUID, batch: _Batch) -> None:
+        try:
+            if len(batch.items) < self.max_size:
+                try:
+                    await asyncio.wait_for(batch.full.wait(), self.window)
+                except asyncio.TimeoutError:
+                    pass
+            self._detach(wallet_uuid, batch)
+            await self._flush(db, wallet_uuid, batch)
+        except Exception as e:
+            for _, _, future in batch.items:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._detach(wallet_uuid, batch)
+            # Без результата остаются, только если отменили саму задачу пачки
+            for _, _, future in batch.items:
+                if not future.done():
+                    future.cancel()
+
+    def _detach(self, wallet_uuid: UUID, batch: _Batch) -> None:
+        if self._pending.get(wallet_uuid) is batch:
+            del self._pending[wallet_uuid]
+        batch.full.set()
+
+    async def _flush(self, db: AsyncSession, wallet_uuid: UUID, batch: _Batch) -> None:
+        self.flushes += 1
+        results = []
+        items = []
+
+        try:
+            async with acquire_lock(db, Wallet, wallet_uuid, "uuid") as wallet:
+                # Операции отменённых до блокировки запросов не применяются
+                items = [item for item in batch.items if not item[2].done()]
+                balance = wallet.balance
+                operations = []
+                for operation_type, amount, _ in items:
+                    try:
+                        balance = apply_operation(balance, operation_type, amount)
+                        results.append(Wallet(uuid=wallet_uuid, balance=balance))
+                        operations.append(
+                            (wallet_uuid, operation_type, amount, balance)
+                        )
+                    except ValueError as e:
+                        results.append(e)
+                wallet.balance = balance
+                await record_operations(db, operations)
+        finally:
+            balance_cache.invalidate(wallet_uuid)
+
+        # Ответы отдаются только после commit всей пачки
+        for (_, _, future), result in zip(items, results):
+            # Запрос могли отменить, пока шёл commit: его операция уже применена
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+wallet_batcher = WalletOperationBatcher(
+    window=settings.wallet_batch_window_ms / 1000,
+    max_size=settings.wallet_batch_max_size,
+)
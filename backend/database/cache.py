@@ -0,0 +1,109 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from uuid import UUID
+
+from settings import settings
+
+
+class BalanceCache:
+    """
+    LRU-кэш балансов с TTL внутри процесса.
+
+    Запись в кэш идёт только через чтение из базы (fill), а любое изменение
+    баланса сбрасывает ключ (invalidate) сразу после commit. Чтобы чтение,
+    начатое до commit, не положило в кэш старый баланс, fill принимает
+    отметку времени token, взятую до запроса, и отбрасывает значение,
+    если после неё ключ сбрасывался.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[UUID, tuple[int, float]] = OrderedDict()
+        self._invalidated: OrderedDict[UUID, int] = OrderedDict()
+        self._clock = 0
+        # Последняя отметка, вытесненная из _invalidated
+        self._floor = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: UUID) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] < time.monotonic():
+            del self._entries[key]
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def token(self) -> int:
+        return self._clock
+
+    def fill(self, key: UUID, balance: int, token: int) -> None:
+        if token < self._floor or self._invalidated.get(key, 0) > token:
+            return
+
+        self._entries[key] = (balance, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: UUID) -> None:
+        self._clock += 1
+        self._entries.pop(key, None)
+
+        self._invalidated[key] = self._clock
+        self._invalidated.move_to_end(key)
+        if len(self._invalidated) > self.max_size:
+            _, self._floor = self._invalidated.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class RecentKeysCache:
+    """LRU недавно использованных ключей идемпотентности"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] < time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: str, value: Any, expires_at: float) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+balance_cache = BalanceCache(
+    max_size=settings.balance_cache_size, ttl=settings.balance_cache_ttl
+)
+idempotency_cache = RecentKeysCache(max_size=settings.idempotency_cache_size)
@@ -1,23 +1,206 @@
-from typing import AsyncGenerator
+import time
+from typing import AsyncGenerator, Optional
 
+from fastapi import Depends
+from metrics import Gauge, db_pool_checkout_seconds, db_reads_total, registry
+from settings import settings
+from sqlalchemy import Select, event, func, select
 from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
                                     create_async_engine)
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .replica import REPLICA_ERRORS, Replica
 
 
 class Base(DeclarativeBase):
     pass
 
 
-DATABASE_URL = "postgresql+asyncpg://postgres:postgres@db:5432/postgres"
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Пул соединений, который замеряет ожидание соединения при checkout"""
+
+    pool_name = "write"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_seconds.observe(
+                time.perf_counter() - start, self.pool_name
+            )
+
+
+class ReadPool(InstrumentedPool):
+    pool_name = "read"
+
 
-engine = create_async_engine(DATABASE_URL, pool_size=24, max_overflow=40)
+class ReplicaPool(InstrumentedPool):
+    pool_name = "replica"
+
+
+DATABASE_URL = settings.database_url
+
+engine = create_async_engine(
+    DATABASE_URL,
+    poolclass=InstrumentedPool,
+    pool_size=settings.worker_pool_size,
+    max_overflow=settings.worker_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+)
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 
+# Чтения из основной базы идут через свой пул: сессии, которые ждут
+# блокировку горячего кошелька, занимают только соединения пула записи
+if settings.worker_read_pool_size:
+    read_pool_options = dict(
+        pool_size=settings.worker_read_pool_size,
+        max_overflow=settings.worker_read_max_overflow,
+        pool_timeout=settings.db_read_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+    read_engine = create_async_engine(
+        DATABASE_URL, poolclass=ReadPool, **read_pool_options
+    )
+else:
+    read_pool_options = dict(
+        pool_size=settings.worker_pool_size,
+        max_overflow=settings.worker_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+    read_engine = engine
+ReadSessionLocal = async_sessionmaker(read_engine, expire_on_commit=False)
+
+replica: Optional[Replica] = None
+if settings.replica_database_url:
+    replica = Replica(
+        create_async_engine(
+            settings.replica_database_url,
+            poolclass=ReplicaPool,
+            connect_args={"timeout": settings.replica_connect_timeout},
+            **read_pool_options,
+        ),
+        max_lag=settings.replica_max_lag,
+        check_interval=settings.replica_check_interval,
+    )
+
+
+def _pool_connections() -> dict[tuple, int]:
+    pools = [engine.sync_engine.pool]
+    if read_engine is not engine:
+        pools.append(read_engine.sync_engine.pool)
+    if replica is not None:
+        pools.append(replica.engine.sync_engine.pool)
+
+    connections = {}
+    for pool in pools:
+        connections[pool.pool_name, "size"] = pool.size()
+        connections[pool.pool_name, "checked_out"] = pool.checkedout()
+        connections[pool.pool_name, "checked_in"] = pool.checkedin()
+        # overflow() отрицательный, пока не занят весь основной пул
+        connections[pool.pool_name, "overflow"] = max(0, pool.overflow())
+    return connections
+
+
+def _replica_lag() -> dict[tuple, float]:
+    if replica is None or replica.lag is None:
+        return {}
+    return {(): replica.lag}
+
+
+registry.register(
+    Gauge(
+        "db_pool_connections",
+        "Соединения пула SQLAlchemy по состоянию",
+        ("pool", "state"),
+        function=_pool_connections,
+    )
+)
+registry.register(
+    Gauge(
+        "db_replica_lag_seconds",
+        "Отставание реплики при последней проверке, с",
+        function=_replica_lag,
+    )
+)
+
+
+def timeouts_stmt(
+    lock_timeout_ms: Optional[int] = None, statement_timeout_ms: Optional[int] = None
+) -> Optional[Select]:
+    """
+    SET LOCAL lock_timeout и statement_timeout одним запросом.
+    Не заданные значения берутся из настроек, 0 - не ограничивать.
+    """
+    if lock_timeout_ms is None:
+        lock_timeout_ms = settings.lock_timeout_ms
+    if statement_timeout_ms is None:
+        statement_timeout_ms = settings.statement_timeout_ms
+
+    timeouts = [
+        func.set_config(name, f"{value}ms", True)
+        for name, value in (
+            ("lock_timeout", lock_timeout_ms),
+            ("statement_timeout", statement_timeout_ms),
+        )
+        if value
+    ]
+    return select(*timeouts) if timeouts else None
+
+
+def apply_timeouts(session: AsyncSession) -> None:
+    """Таймауты из настроек в начале каждой транзакции сессии"""
+
+    @event.listens_for(session.sync_session, "after_begin")
+    def set_timeouts(sync_session, transaction, connection):
+        stmt = timeouts_stmt()
+        if stmt is not None:
+            connection.execute(stmt)
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
+        apply_timeouts(session)
         try:
             yield session
         finally:
             await session.close()
+
+
+async def get_primary_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Сессия на пуле чтения основной базы"""
+
+    async with ReadSessionLocal() as session:
+        apply_timeouts(session)
+        yield session
+
+
+async def get_read_db(
+    db: AsyncSession = Depends(get_primary_read_db),
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия для ручек только на чтение: реплика, если она настроена,
+    доступна и отстаёт не больше REPLICA_MAX_LAG, иначе пул чтения основной
+    базы. Сессия основной базы подключается к ней только при первом запросе.
+    """
+    if replica is not None and await replica.usable():
+        async with replica.session() as session:
+            apply_timeouts(session)
+            try:
+                await session.connection()
+            except REPLICA_ERRORS:
+                replica.mark_down()
+            else:
+                db_reads_total.inc("replica")
+                try:
+                    yield session
+                except REPLICA_ERRORS:
+                    replica.mark_down()
+                    raise
+                return
+
+    db_reads_total.inc("primary")
+    yield db
@@ -0,0 +1,43 @@
+class RecordNotFoundError(ValueError):
+    """Запись не найдена"""
+
+
+class RecordLockedError(Exception):
+    """Запись занята другой транзакцией, ждать её не стали"""
+
+
+class StatementTimeoutError(Exception):
+    """Запрос прерван по statement_timeout"""
+
+
+class WalletNotFoundError(RecordNotFoundError):
+    """Кошелёк не найден"""
+
+
+class InsufficientFundsError(ValueError):
+    """Недостаточно средств для списания"""
+
+    def __init__(self, message: str = "Недостаточно средств"):
+        super().__init__(message)
+
+
+class BalanceOverflowError(ValueError):
+    """Баланс после операции превышает BIGINT"""
+
+    def __init__(
+        self, message: str = "Баланс превышает максимально допустимое значение"
+    ):
+        super().__init__(message)
+
+
+class BatchOperationError(ValueError):
+    """Операция пакета не выполнена, весь пакет откатан"""
+
+    def __init__(self, index: int, error: ValueError):
+        super().__init__(f"Операция #{index}: {error}")
+        self.index = index
+        self.error = error
+
+
+class IdempotencyKeyInUseError(Exception):
+    """Ключ идемпотентности уже записан другим запросом"""
@@ -1,28 +1,327 @@
-from contextlib import asynccontextmanager
-from typing import Type, TypeVar
+import asyncio
+import hashlib
+import heapq
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from dataclasses import dataclass
+from enum import Enum
+from typing import Hashable, Optional, Type, TypeVar, Union
 
-from sqlalchemy import select
+from asyncpg import PostgresError
+from metrics import Gauge, db_lock_hold_seconds, db_lock_wait_seconds, registry
+from settings import settings
+from sqlalchemy import exists, func, select
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 
+from .exceptions import (RecordLockedError, RecordNotFoundError,
+                         StatementTimeoutError)
+
 ModelType = TypeVar("ModelType", bound=DeclarativeBase)
 
+LOCK_NOT_AVAILABLE = "55P03"
+QUERY_CANCELED = "57014"
+
+
+class LockStrategy(str, Enum):
+    FOR_UPDATE = "for_update"  # Ждать блокировку строки
+    NOWAIT = "nowait"  # Сразу ошибка, если строка занята
+    SKIP_LOCKED = "skip_locked"  # Пропустить занятую строку
+    ADVISORY = "advisory"  # pg_advisory_xact_lock по хэшу ключа
+
+
+class StripedLock:
+    """
+    Набор asyncio.Lock, ключ попадает в полосу по хэшу.
+
+    Запросы к одной записи ждут друг друга в event loop процесса, а не
+    на соединении из пула внутри SELECT ... FOR UPDATE. Блокировка
+    строки в базе всё равно берётся: она защищает от других процессов.
+    """
+
+    def __init__(self, stripes: int):
+        self._locks = [asyncio.Lock() for _ in range(stripes)]
+        self._waiting = [0] * stripes
+        self.max_waiting = 0
+
+    def stripe(self, key: Hashable) -> int:
+        return hash(key) % len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable):
+        index = self.stripe(key)
+        lock = self._locks[index]
+
+        if not lock.locked() and not self._waiting[index]:
+            await lock.acquire()
+        else:
+            # В очереди считаются только те, кому действительно придётся ждать
+            self._waiting[index] += 1
+            self.max_waiting = max(self.max_waiting, self._waiting[index])
+            try:
+                await lock.acquire()
+            finally:
+                self._waiting[index] -= 1
+
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def stats(self) -> dict:
+        busy = [
+            {"stripe": index, "waiting": self._waiting[index], "held": lock.locked()}
+            for index, lock in enumerate(self._locks)
+            if lock.locked() or self._waiting[index]
+        ]
+        return {
+            "stripes": len(self._locks),
+            "waiting": sum(self._waiting),
+            "max_waiting": self.max_waiting,
+            "busy": busy,
+        }
+
+
+@dataclass
+class KeyContention:
+    """Блокировки одной записи: сколько раз, сколько ждали и держали, с"""
+
+    acquired: int = 0
+    failed: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    hold_total: float = 0.0
+    hold_max: float = 0.0
+
+
+class LockTimer:
+    """Замер одной блокировки: от запроса за ней до конца транзакции"""
+
+    def __init__(self, contention: "LockContention", key: tuple):
+        self.contention = contention
+        self.key = key
+        self.started = time.perf_counter()
+        self.acquired_at: Optional[float] = None
+
+    def acquired(self) -> None:
+        self.acquired_at = time.perf_counter()
+
+    def finish(self) -> None:
+        now = time.perf_counter()
+        if self.acquired_at is None:
+            self.contention.record(self.key, now - self.started)
+        else:
+            self.contention.record(
+                self.key, self.acquired_at - self.started, now - self.acquired_at
+            )
+
+
+class LockContention:
+    """
+    Статистика блокировок по ключам (таблица, id): ожидание - сколько
+    возвращался блокирующий запрос, удержание - работа вызывающего кода
+    и commit. Хранится max_keys ключей, дольше всех не блокировавшиеся
+    вытесняются первыми.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._entries: OrderedDict[tuple, KeyContention] = OrderedDict()
+
+    def timer(self, model_class: Type[ModelType], record_id) -> LockTimer:
+        return LockTimer(self, (model_class.__tablename__, record_id))
+
+    def record(self, key: tuple, wait: float, hold: Optional[float] = None) -> None:
+        """hold=None - блокировку так и не получили"""
+
+        if not settings.lock_stats:
+            return
+
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = KeyContention()
+            if len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+
+        entry.wait_total += wait
+        entry.wait_max = max(entry.wait_max, wait)
+        db_lock_wait_seconds.observe(wait, key[0])
+        if hold is None:
+            entry.failed += 1
+            return
+
+        entry.acquired += 1
+        entry.hold_total += hold
+        entry.hold_max = max(entry.hold_max, hold)
+        db_lock_hold_seconds.observe(hold, key[0])
+
+    def get(self, model_class: Type[ModelType], record_id) -> Optional[KeyContention]:
+        return self._entries.get((model_class.__tablename__, record_id))
+
+    def hottest(
+        self, model_class: Type[ModelType], limit: int
+    ) -> list[tuple[Hashable, KeyContention]]:
+        """limit записей таблицы с наибольшим суммарным ожиданием"""
+
+        table = model_class.__tablename__
+        return heapq.nlargest(
+            limit,
+            (
+                (record_id, entry)
+                for (key_table, record_id), entry in self._entries.items()
+                if key_table == table
+            ),
+            key=lambda item: item[1].wait_total,
+        )
+
+
+row_locks = StripedLock(settings.row_lock_stripes)
+lock_contention = LockContention(settings.lock_stats_size)
+
+
+def _row_lock_waiting() -> dict[tuple, int]:
+    # Только занятые полосы: серия на каждую из тысячи полос ничего не даёт
+    return {
+        (str(stripe["stripe"]),): stripe["waiting"]
+        for stripe in row_locks.stats()["busy"]
+    }
+
+
+registry.register(
+    Gauge(
+        "row_lock_waiting",
+        "Запросы в очереди на полосу блокировок в процессе",
+        ("stripe",),
+        function=_row_lock_waiting,
+    )
+)
+registry.register(
+    Gauge(
+        "row_lock_max_waiting",
+        "Самая длинная очередь на полосу блокировок с запуска процесса",
+        function=lambda: {(): row_locks.max_waiting},
+    )
+)
+
+
+def local_lock(model_class: Type[ModelType], record_id):
+    """Блокировка записи внутри процесса, если она включена в настройках"""
+
+    if not settings.row_lock_striping:
+        return nullcontext()
+    return row_locks.hold((model_class.__tablename__, record_id))
+
+
+def advisory_key(model_class: Type[ModelType], record_id) -> int:
+    """64-битный ключ advisory-блокировки, одинаковый во всех процессах"""
+
+    raw = f"{model_class.__tablename__}:{record_id}".encode()
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), signed=True)
+
+
+def sqlstate(error: Union[DBAPIError, PostgresError]) -> Optional[str]:
+    """Код SQLSTATE ошибки базы: из исключения драйвера или его причины"""
+    orig = getattr(error, "orig", error)
+    return getattr(orig, "sqlstate", None) or getattr(orig.__cause__, "sqlstate", None)
+
+
+@contextmanager
+def lock_errors(record_id):
+    """
+    Ошибки ожидания в базе: занятая строка, NOWAIT и lock_timeout дают
+    RecordLockedError, statement_timeout - StatementTimeoutError
+    """
+    try:
+        yield
+    except (DBAPIError, PostgresError) as e:
+        state = sqlstate(e)
+        if state == LOCK_NOT_AVAILABLE:
+            raise RecordLockedError(f"Record is locked: {record_id}") from e
+        if state == QUERY_CANCELED:
+            raise StatementTimeoutError(f"Statement timeout: {record_id}") from e
+        raise
+
 
 @asynccontextmanager
 async def acquire_lock(
-    db: AsyncSession, model_class: Type[ModelType], record_id, id_column: str = "id"
+    db: AsyncSession,
+    model_class: Type[ModelType],
+    record_id,
+    id_column: str = "id",
+    strategy: Optional[LockStrategy] = None,
+    lock_timeout_ms: Optional[int] = None,
 ):
-    async with db.begin():
-        stmt = (
-            select(model_class)
-            .where(getattr(model_class, id_column) == record_id)
-            .with_for_update()
-        )
+    """
+    Транзакция с заблокированной записью.
+
+    lock_timeout_ms переопределяет lock_timeout из настроек для этой
+    транзакции (0 - ждать без ограничения); не дождавшись блокировки,
+    получим RecordLockedError.
+
+    Ожидание и удержание блокировки пишутся в lock_contention.
+
+    strategy по умолчанию берётся из настроек:
+    - FOR_UPDATE - SELECT ... FOR UPDATE, ждёт освобождения строки
+    - NOWAIT - FOR UPDATE NOWAIT, занятая строка даёт RecordLockedError
+    - SKIP_LOCKED - FOR UPDATE SKIP LOCKED, занятая строка тоже даёт
+      RecordLockedError, без ожидания
+    - ADVISORY - pg_advisory_xact_lock по хэшу ключа, затем FOR UPDATE.
+      Транзакции с advisory-блокировкой ждут друг друга ещё до строки,
+      блокировка строки не даёт потерять изменения тех, кто пишет без
+      advisory (одиночный UPDATE, пакеты операций).
+    """
+    strategy = LockStrategy(strategy or settings.lock_strategy)
+    id_attr = getattr(model_class, id_column)
+
+    timer = None
+    try:
+        async with local_lock(model_class, record_id), db.begin():
+            # Соединение берётся из пула до замера ожидания блокировки
+            await db.connection()
+            if lock_timeout_ms is not None:
+                await db.execute(
+                    select(
+                        func.set_config("lock_timeout", f"{lock_timeout_ms}ms", True)
+                    )
+                )
+
+            stmt = select(model_class).where(id_attr == record_id)
+            timer = lock_contention.timer(model_class, record_id)
+
+            if strategy == LockStrategy.ADVISORY:
+                with lock_errors(record_id):
+                    await db.execute(
+                        select(
+                            func.pg_advisory_xact_lock(
+                                advisory_key(model_class, record_id)
+                            )
+                        )
+                    )
+                stmt = stmt.with_for_update()
+            elif strategy == LockStrategy.NOWAIT:
+                stmt = stmt.with_for_update(nowait=True)
+            elif strategy == LockStrategy.SKIP_LOCKED:
+                stmt = stmt.with_for_update(skip_locked=True)
+            else:
+                stmt = stmt.with_for_update()
+
+            with lock_errors(record_id):
+                result = await db.execute(stmt)
+            record = result.scalar_one_or_none()
 
-        result = await db.execute(stmt)
-        record = result.scalar_one_or_none()
+            if not record and strategy == LockStrategy.SKIP_LOCKED:
+                if await db.scalar(select(exists().where(id_attr == record_id))):
+                    raise RecordLockedError(f"Record is locked: {record_id}")
 
-        if not record:
-            raise ValueError(f"Record not found: {record_id}")
+            if not record:
+                raise RecordNotFoundError(f"Record not found: {record_id}")
 
-        yield record
+            timer.acquired()
+            yield record
+    finally:
+        if timer is not None:
+            timer.finish()
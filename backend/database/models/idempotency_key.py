@@ -0,0 +1,19 @@
+from datetime import datetime
+from uuid import UUID
+
+from database.db import Base
+from sqlalchemy import BigInteger, DateTime, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    wallet_uuid: Mapped[UUID]
+    operation_type: Mapped[str]
+    amount: Mapped[int] = mapped_column(BigInteger)
+    new_balance: Mapped[int] = mapped_column(BigInteger)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
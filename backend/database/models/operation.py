@@ -0,0 +1,117 @@
+"""
+Журнал операций над кошельками: только INSERT, в одной транзакции с
+изменением баланса. Таблица секционирована по месяцам created_at,
+секции заранее создаёт wallet_operations_create_partitions.
+"""
+
+from datetime import datetime
+from uuid import UUID
+
+from database.db import Base
+from settings import settings
+from sqlalchemy import (DDL, BigInteger, DateTime, Identity,
+                        PrimaryKeyConstraint, String, event, func)
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class Operation(Base):
+    __tablename__ = "wallet_operations"
+    __table_args__ = (
+        # История кошелька читается только из индекса: ключ страницы
+        # (wallet_uuid, created_at, id), остальные поля в INCLUDE
+        PrimaryKeyConstraint(
+            "wallet_uuid",
+            "created_at",
+            "id",
+            postgresql_include=["operation_type", "amount", "balance"],
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity())
+    wallet_uuid: Mapped[UUID]
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    operation_type: Mapped[str] = mapped_column(String)
+    amount: Mapped[int] = mapped_column(BigInteger)
+    # Баланс после операции
+    balance: Mapped[int] = mapped_column(BigInteger)
+
+
+# Секции по месяцам UTC от текущего до months_ahead вперёд. Ошибка одного
+# месяца не мешает создать остальные.
+CREATE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION wallet_operations_create_partitions(months_ahead int)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start timestamp := date_trunc('month', now() AT TIME ZONE 'UTC');
+    month timestamp;
+    partition_start timestamptz;
+    partition_end timestamptz;
+    partition_name text;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        month := month_start + make_interval(months => i);
+        partition_start := month AT TIME ZONE 'UTC';
+        partition_end := (month + interval '1 month') AT TIME ZONE 'UTC';
+        partition_name := 'wallet_operations_' || to_char(month, 'YYYY_MM');
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+        BEGIN
+            BEGIN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF wallet_operations '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, partition_start, partition_end
+                );
+            EXCEPTION WHEN check_violation THEN
+                -- В секции по умолчанию уже есть строки этого месяца: они
+                -- переносятся в новую таблицу, и она подключается секцией
+                LOCK TABLE wallet_operations_default IN ACCESS EXCLUSIVE MODE;
+                EXECUTE format(
+                    'CREATE TABLE %I (LIKE wallet_operations INCLUDING DEFAULTS)',
+                    partition_name
+                );
+                EXECUTE format(
+                    'WITH moved AS ('
+                    '    DELETE FROM wallet_operations_default'
+                    '    WHERE created_at >= %L AND created_at < %L RETURNING *'
+                    ') INSERT INTO %I SELECT * FROM moved',
+                    partition_start, partition_end, partition_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE wallet_operations ATTACH PARTITION %I '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, partition_start, partition_end
+                );
+            END;
+        EXCEPTION WHEN OTHERS THEN
+            -- Остальные месяцы всё равно создаются
+            RAISE WARNING 'wallet_operations: секция % не создана: %',
+                partition_name, SQLERRM;
+        END;
+    END LOOP;
+END
+$$
+"""
+
+# Операции вне созданных секций не должны ронять изменение баланса
+CREATE_DEFAULT_PARTITION = """
+CREATE TABLE IF NOT EXISTS wallet_operations_default
+PARTITION OF wallet_operations DEFAULT
+"""
+
+for statement in [
+    # DDL подставляет параметры через %, свои % нужно экранировать
+    CREATE_PARTITIONS_FUNCTION.replace("%", "%%"),
+    "SELECT wallet_operations_create_partitions("
+    f"{settings.operations_partitions_ahead})",
+    CREATE_DEFAULT_PARTITION,
+]:
+    event.listen(
+        Operation.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
@@ -0,0 +1,100 @@
+"""
+Сводка по всем кошелькам для /wallets/aggregates: число кошельков и сумма
+балансов по корзинам баланса (корзина - число цифр баланса, 0 - нулевой).
+
+Триггеры на wallets в той же транзакции дописывают изменения в
+wallet_stats_deltas - только INSERT, без общей горячей строки. Фоновая
+задача периодически сворачивает накопленные изменения в wallet_stats.
+"""
+
+from decimal import Decimal
+
+from database.db import Base
+from sqlalchemy import DDL, BigInteger, Identity, Numeric, SmallInteger, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class WalletStats(Base):
+    __tablename__ = "wallet_stats"
+
+    bucket: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    wallets: Mapped[int] = mapped_column(BigInteger)
+    # Сумма балансов может не поместиться в bigint
+    total: Mapped[Decimal] = mapped_column(Numeric)
+
+
+class WalletStatsDelta(Base):
+    __tablename__ = "wallet_stats_deltas"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    bucket: Mapped[int] = mapped_column(SmallInteger)
+    wallets: Mapped[int] = mapped_column(BigInteger)
+    total: Mapped[Decimal] = mapped_column(Numeric)
+
+
+BUCKET_FUNCTION = """
+CREATE OR REPLACE FUNCTION wallet_balance_bucket(balance bigint) RETURNS smallint
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$ SELECT CASE WHEN balance <= 0 THEN 0 ELSE length(balance::text) END $$
+"""
+
+CAPTURE_FUNCTION = """
+CREATE OR REPLACE FUNCTION wallet_stats_capture() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO wallet_stats_deltas (bucket, wallets, total)
+        SELECT wallet_balance_bucket(balance), count(*), sum(balance)
+        FROM new_rows
+        GROUP BY 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO wallet_stats_deltas (bucket, wallets, total)
+        SELECT wallet_balance_bucket(balance), -count(*), -sum(balance)
+        FROM old_rows
+        GROUP BY 1;
+    ELSE
+        INSERT INTO wallet_stats_deltas (bucket, wallets, total)
+        SELECT bucket, sum(wallets), sum(total)
+        FROM (
+            SELECT wallet_balance_bucket(balance) AS bucket, 1 AS wallets,
+                   balance::numeric AS total
+            FROM new_rows
+            UNION ALL
+            SELECT wallet_balance_bucket(balance), -1, -balance::numeric
+            FROM old_rows
+        ) changes
+        GROUP BY bucket
+        HAVING sum(wallets) <> 0 OR sum(total) <> 0;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+# Триггеры уровня оператора с таблицами переходов: пакетное изменение
+# или COPY на тысячи кошельков дают по строке на корзину, а не на кошелёк
+CAPTURE_TRIGGERS = [
+    """
+    CREATE OR REPLACE TRIGGER wallet_stats_insert AFTER INSERT ON wallets
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION wallet_stats_capture()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER wallet_stats_update AFTER UPDATE ON wallets
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION wallet_stats_capture()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER wallet_stats_delete AFTER DELETE ON wallets
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION wallet_stats_capture()
+    """,
+]
+
+for statement in [BUCKET_FUNCTION, CAPTURE_FUNCTION, *CAPTURE_TRIGGERS]:
+    event.listen(
+        Base.metadata,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
@@ -0,0 +1,106 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from settings import settings
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryProfile:
+    """Запросы к базе за время одного HTTP-запроса"""
+
+    statements: int = 0
+    commits: int = 0
+    duration: float = 0.0
+    # Тексты запросов с длительностью, только если включён лог
+    log: Optional[list[tuple[str, float]]] = None
+
+    def server_timing(self) -> str:
+        return (
+            f"db;dur={self.duration * 1000:.3f}, "
+            f'db-statements;desc="{self.statements}", '
+            f'db-commits;desc="{self.commits}"'
+        )
+
+
+_current_profile: ContextVar[Optional[QueryProfile]] = ContextVar(
+    "query_profile", default=None
+)
+
+
+# Слушатели вешаются на класс Engine, поэтому видят любой движок, включая
+# engine из database/db.py. Без активного профиля они ничего не делают.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        context._profile_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    started = getattr(context, "_profile_started", None)
+    if profile is None or started is None:
+        return
+
+    elapsed = time.perf_counter() - started
+    profile.statements += 1
+    profile.duration += elapsed
+    if profile.log is not None:
+        profile.log.append((statement, elapsed))
+
+
+@event.listens_for(Engine, "commit")
+def _commit(conn):
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.commits += 1
+
+
+class SQLProfilingMiddleware:
+    """
+    Число запросов к базе, COMMIT и время выполнения запросов для каждого
+    HTTP-запроса в заголовке Server-Timing. Время COMMIT в db не входит:
+    у SQLAlchemy нет события после него.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.sql_profiling:
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(log=[] if settings.sql_profiling_log else None)
+        token = _current_profile.set(profile)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_profile.reset(token)
+
+        if profile.log is not None:
+            logger.info(
+                "%s %s: %d statements, %d commits, %.3f ms",
+                scope["method"],
+                scope["path"],
+                profile.statements,
+                profile.commits,
+                profile.duration * 1000,
+            )
+            for statement, elapsed in profile.log:
+                logger.info("  %.3f ms: %s", elapsed * 1000, statement)
@@ -0,0 +1,93 @@
+from datetime import timedelta
+from typing import Optional
+from uuid import UUID
+
+from database.models.idempotency_key import IdempotencyKey
+from settings import settings
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..cache import idempotency_cache
+
+
+def _expired_before():
+    return func.now() - timedelta(seconds=settings.idempotency_ttl)
+
+
+def remember_idempotency_key(record: IdempotencyKey) -> None:
+    """Положить записанный ключ в кэш недавних ключей"""
+
+    expires_at = record.created_at.timestamp() + settings.idempotency_ttl
+    idempotency_cache.put(record.key, record, expires_at)
+
+
+async def get_idempotency_key(db: AsyncSession, key: str) -> Optional[IdempotencyKey]:
+    """Действующая запись по ключу: сначала из памяти, потом из базы"""
+
+    record = idempotency_cache.get(key)
+    if record is not None:
+        return record
+
+    table = IdempotencyKey.__table__
+    async with db.begin():
+        result = await db.execute(
+            select(table).where(
+                table.c.key == key, table.c.created_at > _expired_before()
+            )
+        )
+        row = result.one_or_none()
+
+    if row is None:
+        return None
+
+    record = IdempotencyKey(**row._mapping)
+    remember_idempotency_key(record)
+    return record
+
+
+async def record_idempotency_key(
+    db: AsyncSession,
+    key: str,
+    wallet_uuid: UUID,
+    operation_type: str,
+    amount: int,
+    new_balance: int,
+) -> Optional[IdempotencyKey]:
+    """
+    Запись ключа в транзакции вызывающего. Просроченная запись с тем же
+    ключом перезаписывается. Если ключ занят действующей записью, в том
+    числе ещё не завершённым параллельным запросом, возвращает None.
+    """
+    table = IdempotencyKey.__table__
+    stmt = insert(table).values(
+        key=key,
+        wallet_uuid=wallet_uuid,
+        operation_type=operation_type,
+        amount=amount,
+        new_balance=new_balance,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.key],
+        set_={
+            "wallet_uuid": stmt.excluded.wallet_uuid,
+            "operation_type": stmt.excluded.operation_type,
+            "amount": stmt.excluded.amount,
+            "new_balance": stmt.excluded.new_balance,
+            "created_at": func.now(),
+        },
+        where=table.c.created_at <= _expired_before(),
+    ).returning(table)
+
+    result = await db.execute(stmt)
+    row = result.one_or_none()
+    return IdempotencyKey(**row._mapping) if row is not None else None
+
+
+async def delete_expired_idempotency_keys(db: AsyncSession) -> int:
+    table = IdempotencyKey.__table__
+    async with db.begin():
+        result = await db.execute(
+            delete(table).where(table.c.created_at <= _expired_before())
+        )
+    return result.rowcount
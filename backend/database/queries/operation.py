@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Optional, Sequence
+from uuid import UUID
+
+from database.models.operation import Operation
+from settings import settings
+from sqlalchemy import Row, func, insert, select, table, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Операция для журнала: кошелёк, тип, сумма, баланс после операции
+OperationEntry = tuple[UUID, str, int, int]
+
+# 4 параметра на строку: asyncpg принимает не больше 32767 параметров в запросе
+RECORD_CHUNK_SIZE = 8_000
+
+
+async def record_operations(
+    db: AsyncSession, operations: Sequence[OperationEntry]
+) -> None:
+    """Запись операций в журнал, в текущей транзакции сессии, пачками"""
+
+    for start in range(0, len(operations), RECORD_CHUNK_SIZE):
+        chunk = operations[start : start + RECORD_CHUNK_SIZE]
+        await db.execute(
+            insert(Operation.__table__).values(
+                [
+                    {
+                        "wallet_uuid": wallet_uuid,
+                        "operation_type": operation_type,
+                        "amount": amount,
+                        "balance": balance,
+                    }
+                    for wallet_uuid, operation_type, amount, balance in chunk
+                ]
+            )
+        )
+
+
+async def get_operations_page(
+    db: AsyncSession,
+    wallet_uuid: UUID,
+    limit: int,
+    before: Optional[tuple[datetime, int]] = None,
+) -> Sequence[Row]:
+    """
+    Операции кошелька от новых к старым, начиная после ключа before
+    (created_at, id). Как и get_wallet_page, возвращает до limit + 1 строк.
+    """
+    table = Operation.__table__
+    stmt = (
+        select(
+            table.c.id,
+            table.c.created_at,
+            table.c.operation_type,
+            table.c.amount,
+            table.c.balance,
+        )
+        .where(table.c.wallet_uuid == wallet_uuid)
+        .order_by(table.c.created_at.desc(), table.c.id.desc())
+        .limit(limit + 1)
+    )
+    if before is not None:
+        stmt = stmt.where(tuple_(table.c.created_at, table.c.id) < before)
+
+    result = await db.execute(stmt)
+    return result.all()
+
+
+async def create_operation_partitions(db: AsyncSession) -> int:
+    """
+    Секции журнала на OPERATIONS_PARTITIONS_AHEAD месяцев вперёд. Возвращает
+    число строк, оставшихся в секции по умолчанию: их месяцы вне созданных
+    секций, и запись туда должна быть исключением.
+    """
+    async with db.begin():
+        await db.execute(
+            select(
+                func.wallet_operations_create_partitions(
+                    settings.operations_partitions_ahead
+                )
+            )
+        )
+        return await db.scalar(
+            select(func.count()).select_from(table("wallet_operations_default"))
+        )
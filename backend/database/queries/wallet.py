@@ -1,42 +1,380 @@
+from typing import AsyncIterator, Optional, Sequence, Union
 from uuid import UUID
 
+from database.models.operation import Operation
 from database.models.wallet import Wallet
-from sqlalchemy import select
+from metrics import db_optimistic_retries_total
+from settings import settings
+from sqlalchemy import (BigInteger, Row, String, Uuid, column, exists, insert,
+                        literal, select, update, values)
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..locking import acquire_lock
+from ..cache import balance_cache
+from ..exceptions import (BalanceOverflowError, BatchOperationError,
+                          IdempotencyKeyInUseError, InsufficientFundsError,
+                          RecordLockedError, WalletNotFoundError)
+from ..locking import (LockStrategy, acquire_lock, local_lock, lock_contention,
+                       lock_errors)
+from . import wallet_asyncpg
+from .idempotency import record_idempotency_key, remember_idempotency_key
+from .operation import record_operations
+
+MAX_BALANCE = 9_223_372_036_854_775_807
+
+# Строк в одном INSERT ... VALUES: по 2 параметра на строку при лимите
+# протокола в 32767 параметров
+INSERT_CHUNK_SIZE = 10_000
+# С какого размера пакета кошельки создаются через COPY
+COPY_THRESHOLD = 20_000
+# Попыток оптимистичного изменения баланса до RecordLockedError
+OPTIMISTIC_MAX_ATTEMPTS = 10
 
 
 async def add_wallet(
     db: AsyncSession, wallet_uuid: UUID, initial_balance: int = 0
 ) -> Wallet:
-    wallet = Wallet(uuid=str(wallet_uuid), balance=initial_balance)
+    wallet = Wallet(uuid=wallet_uuid, balance=initial_balance)
     db.add(wallet)
     await db.commit()
-    await db.refresh(wallet)
+    balance_cache.invalidate(wallet_uuid)
     return wallet
 
 
+async def add_wallets(db: AsyncSession, wallets: Sequence[tuple[UUID, int]]) -> None:
+    """
+    Массовое создание кошельков (uuid, начальный баланс) в одной транзакции:
+    многострочными INSERT, а для больших пакетов через COPY.
+    """
+    async with db.begin():
+        if len(wallets) >= COPY_THRESHOLD:
+            connection = await db.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                Wallet.__tablename__, records=wallets, columns=["uuid", "balance"]
+            )
+            return
+
+        for start in range(0, len(wallets), INSERT_CHUNK_SIZE):
+            chunk = wallets[start : start + INSERT_CHUNK_SIZE]
+            await db.execute(
+                insert(Wallet.__table__).values(
+                    [{"uuid": wallet_uuid, "balance": b} for wallet_uuid, b in chunk]
+                )
+            )
+
+
 async def get_wallet(db: AsyncSession, wallet_uuid: UUID) -> Wallet:
-    result = await db.execute(select(Wallet).where(Wallet.uuid == str(wallet_uuid)))
-    wallet = result.scalar_one_or_none()
+    # Баланс с реплики может отставать, в кэш его не кладём
+    use_cache = settings.balance_cache and not db.info.get("replica")
+    if use_cache:
+        balance = balance_cache.get(wallet_uuid)
+        if balance is not None:
+            return Wallet(uuid=wallet_uuid, balance=balance)
+        token = balance_cache.token()
+
+    if settings.db_backend == "asyncpg":
+        balance = await wallet_asyncpg.get_balance(db, wallet_uuid)
+        wallet = None if balance is None else Wallet(uuid=wallet_uuid, balance=balance)
+    else:
+        result = await db.execute(select(Wallet).where(Wallet.uuid == wallet_uuid))
+        wallet = result.scalar_one_or_none()
+
+    if use_cache and wallet is not None:
+        balance_cache.fill(wallet_uuid, wallet.balance, token)
     return wallet
 
 
+async def get_wallet_page(
+    db: AsyncSession,
+    limit: int,
+    after: Optional[UUID] = None,
+    min_balance: Optional[int] = None,
+    max_balance: Optional[int] = None,
+) -> Sequence[Row]:
+    """
+    Страница (uuid, balance) по первичному ключу после after.
+    Возвращает до limit + 1 строк: лишняя строка означает, что есть
+    следующая страница.
+    """
+    if settings.db_backend == "asyncpg":
+        return await wallet_asyncpg.get_page(db, limit, after, min_balance, max_balance)
+
+    stmt = select(Wallet.uuid, Wallet.balance).order_by(Wallet.uuid).limit(limit + 1)
+
+    if after is not None:
+        stmt = stmt.where(Wallet.uuid > after)
+    if min_balance is not None:
+        stmt = stmt.where(Wallet.balance >= min_balance)
+    if max_balance is not None:
+        stmt = stmt.where(Wallet.balance <= max_balance)
+
+    result = await db.execute(stmt)
+    return result.all()
+
+
+async def stream_wallets(
+    db: AsyncSession, chunk_size: int = 1000
+) -> AsyncIterator[Sequence[Row]]:
+    """Все кошельки пачками через серверный курсор"""
+
+    stmt = (
+        select(Wallet.uuid, Wallet.balance)
+        .order_by(Wallet.uuid)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
+
+
+def _balance_update_stmt(wallet_uuid: UUID, operation_type: str, amount: int):
+    """
+    Один запрос: условный UPDATE ... RETURNING в CTE и признак существования
+    кошелька из того же снимка. Если UPDATE не вернул строку, по признаку
+    существования и типу операции понятно, что именно пошло не так,
+    без повторного чтения под блокировкой. Успешная операция попадает
+    в журнал операций тем же запросом.
+    """
+    table = Wallet.__table__
+
+    if operation_type == "WITHDRAW":
+        new_balance = table.c.balance - amount
+        check = table.c.balance >= amount
+    else:
+        new_balance = table.c.balance + amount
+        check = table.c.balance <= MAX_BALANCE - amount
+
+    updated = (
+        update(table)
+        .where(table.c.uuid == wallet_uuid, check)
+        .values(balance=new_balance)
+        .returning(table.c.balance)
+        .cte("updated")
+    )
+
+    logged = (
+        insert(Operation.__table__)
+        .from_select(
+            ["wallet_uuid", "operation_type", "amount", "balance"],
+            select(
+                literal(wallet_uuid, Uuid),
+                literal(operation_type, String),
+                literal(amount, BigInteger),
+                updated.c.balance,
+            ),
+        )
+        .cte("logged")
+    )
+
+    return select(
+        select(updated.c.balance).scalar_subquery(),
+        exists().where(table.c.uuid == wallet_uuid),
+    ).add_cte(logged)
+
+
 async def update_wallet_balance(
-    db: AsyncSession, wallet_uuid: UUID, operation_type: str, amount: int
+    db: AsyncSession,
+    wallet_uuid: UUID,
+    operation_type: str,
+    amount: int,
+    idempotency_key: Optional[str] = None,
 ) -> Wallet:
-    async with acquire_lock(db, Wallet, str(wallet_uuid), "uuid") as wallet:
-        if operation_type == "WITHDRAW":
-            if wallet.balance < amount:
-                raise ValueError("Недостаточно средств")
-            wallet.balance -= amount
-        else:
-            new_balance = wallet.balance + amount
+    """
+    Изменение баланса одним запросом. С idempotency_key успешная операция
+    записывает ключ в той же транзакции; если ключ уже занят, транзакция
+    откатывается с IdempotencyKeyInUseError.
+
+    С DB_BACKEND=asyncpg запрос без ключа идемпотентности идёт через
+    prepared statement; вне явной транзакции (без таймаутов из настроек)
+    это один запрос без BEGIN и COMMIT.
+    """
+    use_asyncpg = settings.db_backend == "asyncpg" and idempotency_key is None
+    record = None
+    timer = None
+    try:
+        async with local_lock(Wallet, wallet_uuid), db.begin():
+            await db.connection()
+            timer = lock_contention.timer(Wallet, wallet_uuid)
+            with lock_errors(wallet_uuid):
+                if use_asyncpg:
+                    balance, found = await wallet_asyncpg.update_balance(
+                        db, wallet_uuid, operation_type, amount
+                    )
+                else:
+                    result = await db.execute(
+                        _balance_update_stmt(wallet_uuid, operation_type, amount)
+                    )
+                    balance, found = result.one()
+                timer.acquired()
+
+                if balance is not None and idempotency_key is not None:
+                    record = await record_idempotency_key(
+                        db,
+                        idempotency_key,
+                        wallet_uuid,
+                        operation_type,
+                        amount,
+                        balance,
+                    )
+                    if record is None:
+                        raise IdempotencyKeyInUseError(idempotency_key)
+    finally:
+        if timer is not None:
+            timer.finish()
+        balance_cache.invalidate(wallet_uuid)
+
+    if record is not None:
+        remember_idempotency_key(record)
+    if balance is not None:
+        return Wallet(uuid=wallet_uuid, balance=balance)
+    if not found:
+        raise WalletNotFoundError(f"Record not found: {wallet_uuid}")
+    if operation_type == "WITHDRAW":
+        raise InsufficientFundsError()
+    raise BalanceOverflowError()
+
+
+def apply_operation(balance: int, operation_type: str, amount: int) -> int:
+    """Новый баланс после операции или ошибка, если операция невозможна"""
+
+    if operation_type == "WITHDRAW":
+        if balance < amount:
+            raise InsufficientFundsError()
+        return balance - amount
+
+    new_balance = balance + amount
+    if new_balance > MAX_BALANCE:
+        raise BalanceOverflowError()
+    return new_balance
+
+
+async def update_wallet_balance_locked(
+    db: AsyncSession,
+    wallet_uuid: UUID,
+    operation_type: str,
+    amount: int,
+    strategy: Optional[LockStrategy] = None,
+) -> Wallet:
+    """Изменение баланса через блокировку записи (acquire_lock) и ORM"""
+
+    try:
+        async with acquire_lock(
+            db, Wallet, wallet_uuid, "uuid", strategy=strategy
+        ) as wallet:
+            wallet.balance = apply_operation(wallet.balance, operation_type, amount)
+            await record_operations(
+                db, [(wallet_uuid, operation_type, amount, wallet.balance)]
+            )
+            return wallet
+    finally:
+        balance_cache.invalidate(wallet_uuid)
+
+
+async def update_wallet_balance_optimistic(
+    db: AsyncSession,
+    wallet_uuid: UUID,
+    operation_type: str,
+    amount: int,
+    max_attempts: int = OPTIMISTIC_MAX_ATTEMPTS,
+) -> Wallet:
+    """
+    Изменение баланса без SELECT ... FOR UPDATE: прочитать баланс и записать
+    новый, только если баланс не изменился (сам баланс служит версией
+    записи). При конфликте чтение повторяется, после max_attempts
+    неудачных попыток - RecordLockedError.
+    """
+    table = Wallet.__table__
+
+    try:
+        for _ in range(max_attempts):
+            async with db.begin():
+                balance = await db.scalar(
+                    select(table.c.balance).where(table.c.uuid == wallet_uuid)
+                )
+                if balance is None:
+                    raise WalletNotFoundError(f"Record not found: {wallet_uuid}")
+
+                new_balance = apply_operation(balance, operation_type, amount)
+                result = await db.execute(
+                    update(table)
+                    .where(table.c.uuid == wallet_uuid, table.c.balance == balance)
+                    .values(balance=new_balance)
+                )
+                if result.rowcount:
+                    await record_operations(
+                        db, [(wallet_uuid, operation_type, amount, new_balance)]
+                    )
+                    return Wallet(uuid=wallet_uuid, balance=new_balance)
+
+            db_optimistic_retries_total.inc()
+    finally:
+        balance_cache.invalidate(wallet_uuid)
+
+    raise RecordLockedError(f"Record is locked: {wallet_uuid}")
+
+
+async def apply_wallet_operations(
+    db: AsyncSession,
+    operations: Sequence[tuple[UUID, str, int]],
+    atomic: bool = True,
+) -> list[Union[Wallet, ValueError]]:
+    """
+    Пакет операций в одной транзакции.
+
+    Все затронутые кошельки блокируются одним SELECT ... FOR UPDATE
+    в порядке первичного ключа, чтобы встречные пакеты не давали
+    взаимоблокировок. Операции применяются по порядку, новые балансы
+    записываются одним UPDATE ... FROM (VALUES ...).
+
+    При atomic=True первая неудачная операция откатывает весь пакет
+    (BatchOperationError), иначе на её месте в результате будет ошибка.
+    """
+    table = Wallet.__table__
+    wallet_uuids = sorted({wallet_uuid for wallet_uuid, _, _ in operations})
+
+    try:
+        async with db.begin():
+            with lock_errors("wallets batch"):
+                result = await db.execute(
+                    select(table.c.uuid, table.c.balance)
+                    .where(table.c.uuid.in_(wallet_uuids))
+                    .order_by(table.c.uuid)
+                    .with_for_update()
+                )
+            balances = dict(result.all())
+            changed = {}
+            results = []
+            operations_log = []
+
+            for index, (wallet_uuid, operation_type, amount) in enumerate(operations):
+                try:
+                    if wallet_uuid not in balances:
+                        raise WalletNotFoundError(f"Record not found: {wallet_uuid}")
+                    balance = apply_operation(
+                        balances[wallet_uuid], operation_type, amount
+                    )
+                except ValueError as e:
+                    if atomic:
+                        raise BatchOperationError(index, e)
+                    results.append(e)
+                    continue
 
-            if new_balance > 9_223_372_036_854_775_807:
-                raise ValueError("Баланс превышает максимально допустимое значение")
+                balances[wallet_uuid] = changed[wallet_uuid] = balance
+                results.append(Wallet(uuid=wallet_uuid, balance=balance))
+                operations_log.append((wallet_uuid, operation_type, amount, balance))
 
-            wallet.balance = new_balance
+            if changed:
+                new_balances = values(
+                    column("uuid", Uuid), column("balance", BigInteger), name="new"
+                ).data(list(changed.items()))
+                await db.execute(
+                    update(table)
+                    .where(table.c.uuid == new_balances.c.uuid)
+                    .values(balance=new_balances.c.balance)
+                )
+                await record_operations(db, operations_log)
+    finally:
+        for wallet_uuid in wallet_uuids:
+            balance_cache.invalidate(wallet_uuid)
 
-        return wallet
+    return results
@@ -0,0 +1,111 @@
+"""
+Запросы к кошелькам напрямую через соединение asyncpg сессии, без
+компиляции SQLAlchemy и ORM (DB_BACKEND=asyncpg). Каждый запрос
+готовится один раз на соединение как именованный prepared statement.
+"""
+
+from collections import namedtuple
+from typing import Optional, Sequence
+from uuid import UUID
+
+from asyncpg.prepared_stmt import PreparedStatement
+from sqlalchemy.ext.asyncio import AsyncSession
+
+WalletRow = namedtuple("WalletRow", ["uuid", "balance"])
+
+_MAX_BALANCE = 9_223_372_036_854_775_807
+
+_GET_BALANCE = "SELECT balance FROM wallets WHERE uuid = $1"
+
+_UPDATE_BALANCE = """
+WITH updated AS (
+    UPDATE wallets SET balance = balance {sign} $2
+    WHERE uuid = $1 AND {check}
+    RETURNING balance
+), logged AS (
+    INSERT INTO wallet_operations (wallet_uuid, operation_type, amount, balance)
+    SELECT $1, '{operation_type}', $2, balance FROM updated
+)
+SELECT (SELECT balance FROM updated), EXISTS (SELECT 1 FROM wallets WHERE uuid = $1)
+"""
+_WITHDRAW = _UPDATE_BALANCE.format(
+    sign="-", check="balance >= $2", operation_type="WITHDRAW"
+)
+_DEPOSIT = _UPDATE_BALANCE.format(
+    sign="+",
+    check=f"balance <= {_MAX_BALANCE} - $2::bigint",
+    operation_type="DEPOSIT",
+)
+
+# Фильтры страницы: имя параметра, условие
+_PAGE_FILTERS = (
+    ("after", "uuid > ${}"),
+    ("min_balance", "balance >= ${}"),
+    ("max_balance", "balance <= ${}"),
+)
+
+
+async def _prepared(db: AsyncSession, name: str, query: str) -> PreparedStatement:
+    """
+    Prepared statement name на соединении сессии. Кэш живёт в info записи
+    пула и сбрасывается, если под ней уже другое соединение asyncpg.
+    """
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+
+    cached = raw_connection.info.get("prepared_statements")
+    if cached is None or cached[0] is not driver_connection:
+        cached = raw_connection.info["prepared_statements"] = (driver_connection, {})
+
+    statement = cached[1].get(name)
+    if statement is None:
+        statement = cached[1][name] = await driver_connection.prepare(query, name=name)
+    return statement
+
+
+async def get_balance(db: AsyncSession, wallet_uuid: UUID) -> Optional[int]:
+    statement = await _prepared(db, "wallet_get_balance", _GET_BALANCE)
+    return await statement.fetchval(wallet_uuid)
+
+
+async def update_balance(
+    db: AsyncSession, wallet_uuid: UUID, operation_type: str, amount: int
+) -> tuple[Optional[int], bool]:
+    """Новый баланс (None, если операция невозможна) и признак существования"""
+
+    if operation_type == "WITHDRAW":
+        statement = await _prepared(db, "wallet_withdraw", _WITHDRAW)
+    else:
+        statement = await _prepared(db, "wallet_deposit", _DEPOSIT)
+    return tuple(await statement.fetchrow(wallet_uuid, amount))
+
+
+async def get_page(
+    db: AsyncSession,
+    limit: int,
+    after: Optional[UUID] = None,
+    min_balance: Optional[int] = None,
+    max_balance: Optional[int] = None,
+) -> Sequence[WalletRow]:
+    """
+    Отдельный prepared statement на каждый набор фильтров: условие
+    вида "$1 IS NULL OR uuid > $1" не дало бы планировщику идти по
+    индексу сразу с позиции курсора.
+    """
+    values = {"after": after, "min_balance": min_balance, "max_balance": max_balance}
+    conditions, args, used = [], [], []
+    for name, condition in _PAGE_FILTERS:
+        if values[name] is not None:
+            args.append(values[name])
+            conditions.append(condition.format(len(args)))
+            used.append(name)
+
+    query = "SELECT uuid, balance FROM wallets"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY uuid LIMIT ${len(args) + 1}"
+
+    statement = await _prepared(db, "_".join(["wallet_page", *used]), query)
+    rows = await statement.fetch(*args, limit + 1)
+    return [WalletRow(row[0], row[1]) for row in rows]
@@ -0,0 +1,72 @@
+from typing import Sequence
+
+from database.models.wallet_stats import WalletStats, WalletStatsDelta
+from sqlalchemy import Row, delete, func, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def get_wallet_stats(db: AsyncSession) -> Sequence[Row]:
+    """
+    Число кошельков и сумма балансов по корзинам: свёрнутая сводка плюс ещё
+    не свёрнутые изменения, одним запросом - в одном снимке базы.
+    """
+    stats = WalletStats.__table__
+    deltas = WalletStatsDelta.__table__
+
+    rows = union_all(
+        select(stats.c.bucket, stats.c.wallets, stats.c.total),
+        select(deltas.c.bucket, deltas.c.wallets, deltas.c.total),
+    ).subquery()
+    result = await db.execute(
+        select(
+            rows.c.bucket,
+            func.sum(rows.c.wallets).label("wallets"),
+            func.sum(rows.c.total).label("total"),
+        )
+        .group_by(rows.c.bucket)
+        .having(func.sum(rows.c.wallets) != 0)
+        .order_by(rows.c.bucket)
+    )
+    return result.all()
+
+
+async def fold_wallet_stats(db: AsyncSession) -> int:
+    """
+    Сворачивает накопленные изменения в wallet_stats и возвращает число
+    свёрнутых строк. Параллельная свёртка просто пропустит уже удалённые.
+    """
+    stats = WalletStats.__table__
+    deltas = WalletStatsDelta.__table__
+
+    folded = (
+        delete(deltas)
+        .returning(deltas.c.bucket, deltas.c.wallets, deltas.c.total)
+        .cte("folded")
+    )
+    sums = (
+        select(
+            folded.c.bucket,
+            func.sum(folded.c.wallets).label("wallets"),
+            func.sum(folded.c.total).label("total"),
+            func.count().label("rows"),
+        )
+        .group_by(folded.c.bucket)
+        .cte("sums")
+    )
+    upsert = insert(stats).from_select(
+        ["bucket", "wallets", "total"],
+        select(sums.c.bucket, sums.c.wallets, sums.c.total),
+    )
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[stats.c.bucket],
+        set_={
+            "wallets": stats.c.wallets + upsert.excluded.wallets,
+            "total": stats.c.total + upsert.excluded.total,
+        },
+    ).cte("upsert")
+
+    async with db.begin():
+        return await db.scalar(
+            select(func.coalesce(func.sum(sums.c.rows), 0)).add_cte(upsert)
+        )
@@ -0,0 +1,90 @@
+"""
+Реплика для чтения (REPLICA_DATABASE_URL). Отставание проверяется не чаще
+раза в check_interval; реплика, отстающая больше max_lag или недоступная,
+не используется, и чтение идёт в основную базу.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker)
+
+logger = logging.getLogger(__name__)
+
+# Если реплика принимает WAL и всё полученное уже применено, она не
+# отстаёт, даже когда последняя транзакция была давно: основная база
+# просто простаивает. Без живого приёма WAL "всё применено" ничего не
+# значит, и отставание считается от последней применённой транзакции.
+# Без pg_read_all_stats (pg_monitor) в pg_stat_wal_receiver виден только
+# pid, тогда проверяется лишь, что процесс приёма WAL запущен.
+LAG_QUERY = text(
+    """
+    SELECT
+        pg_is_in_recovery() AS in_recovery,
+        CASE
+            WHEN EXISTS (
+                SELECT 1 FROM pg_stat_wal_receiver
+                WHERE coalesce(status, 'streaming') = 'streaming'
+            ) AND pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+        END AS lag
+    """
+)
+
+# Ошибки, после которых реплика считается недоступной
+REPLICA_ERRORS = (DBAPIError, OSError)
+
+
+class Replica:
+    """Реплика со своим пулом соединений и кэшированной проверкой отставания"""
+
+    def __init__(self, engine: AsyncEngine, max_lag: float, check_interval: float):
+        self.engine = engine
+        self.session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        # Последнее измеренное отставание, с; None - реплика недоступна
+        self.lag: Optional[float] = None
+        self._checked_at = float("-inf")
+        self._check_lock = asyncio.Lock()
+
+    async def measure_lag(self) -> Optional[float]:
+        try:
+            async with self.engine.connect() as connection:
+                result = await connection.execute(LAG_QUERY)
+                in_recovery, lag = result.one()
+        except REPLICA_ERRORS:
+            return None
+        if not in_recovery:
+            # Не standby: отставание от основной базы не измерить
+            logger.warning("REPLICA_DATABASE_URL указывает не на реплику")
+            return None
+        # NULL - реплика ещё не применила ни одной транзакции
+        return None if lag is None else float(lag)
+
+    async def usable(self) -> bool:
+        """Реплика доступна и отстаёт не больше max_lag"""
+
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            async with self._check_lock:
+                if time.monotonic() - self._checked_at >= self.check_interval:
+                    self.lag = await self.measure_lag()
+                    self._checked_at = time.monotonic()
+        return self.lag is not None and self.lag <= self.max_lag
+
+    def mark_down(self) -> None:
+        """Ошибка соединения при чтении: до следующей проверки читать из основной"""
+
+        self.lag = None
+        self._checked_at = time.monotonic()
+
+    def session(self) -> AsyncSession:
+        session = self.session_factory()
+        # По этой отметке запросы узнают, что данные могут отставать
+        session.info["replica"] = True
+        return session
@@ -1,7 +1,9 @@
+from datetime import datetime
 from enum import Enum
+from typing import Annotated, List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class OperationType(str, Enum):
@@ -9,6 +11,16 @@ class OperationType(str, Enum):
     WITHDRAW = "WITHDRAW"  # Списание
 
 
+class BatchMode(str, Enum):
+    ATOMIC = "ATOMIC"  # Всё или ничего
+    PARTIAL = "PARTIAL"  # Результат по каждой операции
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 class WalletOperation(BaseModel):
     """Операция изменения баланса"""
 
@@ -23,6 +35,28 @@ class WalletBalanceResponse(BaseModel):
     balance: int
 
 
+class BulkCreateRequest(BaseModel):
+    """Массовое создание кошельков: количество или список начальных балансов"""
+
+    count: Optional[int] = Field(None, gt=0, le=100_000)
+    balances: Optional[
+        List[Annotated[int, Field(ge=0, le=9_223_372_036_854_775_807)]]
+    ] = Field(None, min_length=1, max_length=100_000)
+
+    @model_validator(mode="after")
+    def check_count_or_balances(self):
+        if (self.count is None) == (self.balances is None):
+            raise ValueError("Нужно указать либо count, либо balances")
+        return self
+
+
+class WalletListResponse(BaseModel):
+    """Страница списка кошельков"""
+
+    items: List[WalletBalanceResponse]
+    next_cursor: Optional[str] = None
+
+
 class OperationResponse(BaseModel):
     """Ответ на операцию"""
 
@@ -31,3 +65,107 @@ class OperationResponse(BaseModel):
     amount: int
     new_balance: int
     status: str = "success"
+
+
+class BatchOperationItem(WalletOperation):
+    """Операция пакета над конкретным кошельком"""
+
+    wallet_id: UUID
+
+
+class BatchOperationRequest(BaseModel):
+    """Пакет операций над кошельками"""
+
+    mode: BatchMode = BatchMode.ATOMIC
+    operations: List[BatchOperationItem] = Field(..., min_length=1, max_length=10_000)
+
+
+class BatchOperationResult(BaseModel):
+    """Результат одной операции пакета"""
+
+    wallet_id: UUID
+    operation_type: OperationType
+    amount: int
+    new_balance: Optional[int] = None
+    status: str = "success"
+    detail: Optional[str] = None
+
+
+class BatchOperationResponse(BaseModel):
+    """Ответ на пакет операций"""
+
+    results: List[BatchOperationResult]
+
+
+class BalanceCacheStats(BaseModel):
+    """Счётчики кэша балансов"""
+
+    enabled: bool
+    size: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class LockStripeStats(BaseModel):
+    """Очередь на одну полосу блокировок"""
+
+    stripe: int
+    waiting: int
+    held: bool
+
+
+class RowLockStats(BaseModel):
+    """Состояние блокировок записей внутри процесса"""
+
+    enabled: bool
+    stripes: int
+    waiting: int
+    max_waiting: int
+    busy: List[LockStripeStats]
+
+
+class WalletLockContention(BaseModel):
+    """Ожидание и удержание блокировки кошелька, с"""
+
+    wallet_id: UUID
+    acquired: int
+    failed: int
+    wait_total: float
+    wait_max: float
+    hold_total: float
+    hold_max: float
+
+
+class BalanceBucket(BaseModel):
+    """Кошельки с балансом от min_balance до max_balance включительно"""
+
+    min_balance: int
+    max_balance: int
+    wallets: int
+    total: int
+
+
+class WalletAggregates(BaseModel):
+    """Сводка по всем кошелькам"""
+
+    wallets: int
+    total: int
+    buckets: List[BalanceBucket]
+
+
+class OperationRecord(BaseModel):
+    """Операция из журнала"""
+
+    id: int
+    operation_type: OperationType
+    amount: int
+    balance: int
+    created_at: datetime
+
+
+class OperationHistoryResponse(BaseModel):
+    """Страница истории операций кошелька, от новых к старым"""
+
+    items: List[OperationRecord]
+    next_cursor: Optional[str] = None
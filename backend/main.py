@@ -1,11 +1,81 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 import uvicorn
 from api import api_router
+from database.db import AsyncSessionLocal
+from database.profiling import SQLProfilingMiddleware
+from database.queries.idempotency import delete_expired_idempotency_keys
+from database.queries.operation import create_operation_partitions
+from database.queries.wallet_stats import fold_wallet_stats
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from metrics import MetricsMiddleware, db_operations_default_rows, registry
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def cleanup_idempotency_keys():
+    """Периодическое удаление просроченных ключей идемпотентности"""
+
+    while True:
+        await asyncio.sleep(settings.idempotency_cleanup_interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                await delete_expired_idempotency_keys(db)
+        except Exception:
+            logger.exception("Не удалось удалить просроченные ключи идемпотентности")
+
+
+async def fold_wallet_stats_deltas():
+    """Периодическая свёртка изменений сводки по кошелькам"""
+
+    while True:
+        await asyncio.sleep(settings.wallet_stats_fold_interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                await fold_wallet_stats(db)
+        except Exception:
+            logger.exception("Не удалось свернуть изменения сводки по кошелькам")
 
-app = FastAPI()
+
+async def maintain_operation_partitions():
+    """Секции журнала операций на месяцы вперёд, при старте и периодически"""
+
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                default_rows = await create_operation_partitions(db)
+            db_operations_default_rows.set(default_rows)
+            if default_rows:
+                logger.warning(
+                    "В секции журнала операций по умолчанию %d строк", default_rows
+                )
+        except Exception:
+            logger.exception("Не удалось создать секции журнала операций")
+        await asyncio.sleep(settings.operations_partition_interval)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    cleanup_task = asyncio.create_task(cleanup_idempotency_keys())
+    fold_task = asyncio.create_task(fold_wallet_stats_deltas())
+    partitions_task = asyncio.create_task(maintain_operation_partitions())
+    yield
+    tasks = [cleanup_task, fold_task, partitions_task]
+    for task in tasks:
+        task.cancel()
+    # Дождаться, пока отменённые задачи завершат свои транзакции
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(SQLProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.include_router(api_router)
 
 templates = Jinja2Templates(directory="templates")
@@ -17,5 +87,19 @@ async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=settings.workers,
+        loop=settings.server_loop,
+        http=settings.server_http,
+    )
@@ -0,0 +1,269 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Optional, Sequence
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    Метрика в текстовом формате Prometheus.
+
+    Значения живут в словаре по кортежу меток и обновляются без блокировок:
+    все запросы процесса идут в одном потоке цикла событий. С несколькими
+    воркерами у каждого процесса свои значения.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for suffix, labelnames, labels, value in self.samples():
+            lines.append(
+                f"{self.name}{suffix}{_format_labels(labelnames, labels)} "
+                f"{_format_value(value)}"
+            )
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield "", self.labelnames, labels, value
+
+
+class Gauge(Counter):
+    """Значение, которое меняют inc/dec, или функция, вызываемая при сборе"""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], dict[tuple, float]]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels) -> None:
+        self._values[labels] = value
+
+    def samples(self):
+        values = self.function() if self.function else self._values
+        for labels, value in values.items():
+            yield "", self.labelnames, labels, value
+
+
+class Histogram(Metric):
+    """
+    Гистограмма с фиксированными границами. Квантили (p50/p95/p99)
+    считает Prometheus через histogram_quantile по *_bucket.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Для каждого набора меток: счётчики по корзинам (последняя - +Inf)
+        # без накопления и сумма наблюдений
+        self._values: dict[tuple, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1][0] += value
+
+    def count(self, *labels) -> int:
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry else 0
+
+    def samples(self):
+        bucket_labelnames = self.labelnames + ("le",)
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = labels + (_format_value(bound),)
+                yield "_bucket", bucket_labelnames, bucket_labels, cumulative
+            yield "_sum", self.labelnames, labels, total[0]
+            yield "_count", self.labelnames, labels, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = Registry()
+
+http_requests_total = registry.register(
+    Counter(
+        "http_requests_total",
+        "Число HTTP-запросов по ручке и коду ответа",
+        ("method", "route", "status"),
+    )
+)
+http_request_duration_seconds = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Время обработки HTTP-запроса, с",
+        ("method", "route"),
+    )
+)
+http_requests_in_progress = registry.register(
+    Gauge("http_requests_in_progress", "Число запросов в обработке")
+)
+db_pool_checkout_seconds = registry.register(
+    Histogram(
+        "db_pool_checkout_seconds",
+        "Ожидание соединения из пула SQLAlchemy, с",
+        ("pool",),
+    )
+)
+db_reads_total = registry.register(
+    Counter(
+        "db_reads_total",
+        "Сессии ручек чтения по базе, в которую они ушли",
+        ("target",),
+    )
+)
+db_lock_wait_seconds = registry.register(
+    Histogram(
+        "db_lock_wait_seconds",
+        "Ожидание блокировки записи в базе, с",
+        ("table",),
+    )
+)
+db_lock_hold_seconds = registry.register(
+    Histogram(
+        "db_lock_hold_seconds",
+        "Удержание блокировки записи до конца транзакции, с",
+        ("table",),
+    )
+)
+db_operations_default_rows = registry.register(
+    Gauge(
+        "db_operations_default_rows",
+        "Строки журнала операций в секции по умолчанию при последней проверке",
+    )
+)
+
+db_optimistic_retries_total = registry.register(
+    Counter(
+        "db_optimistic_retries_total",
+        "Повторы оптимистичного изменения баланса после конфликта",
+    )
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware со счётчиками запросов. Метка route - шаблон пути
+    ручки (/api/v1/wallets/{wallet_uuid}), а не сам путь, чтобы число
+    рядов не росло вместе с числом кошельков.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_progress.dec()
+
+            route = scope.get("route")
+            route_path = route.path if route is not None else "other"
+            method = scope["method"]
+            http_request_duration_seconds.observe(elapsed, method, route_path)
+            http_requests_total.inc(method, route_path, status_code)
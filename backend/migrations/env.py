@@ -2,13 +2,19 @@ from logging.config import fileConfig
 
 from alembic import context
 from database.db import DATABASE_URL
+from database.models.idempotency_key import *  # noqa
+from database.models.operation import *  # noqa
 from database.models.wallet import *  # noqa
 from database.models.wallet import Base
-from sqlalchemy import engine_from_config, pool
+from database.models.wallet_stats import *  # noqa
+from sqlalchemy import engine_from_config, make_url, pool
 
 config = context.config
 
-config.set_main_option("sqlalchemy.url", DATABASE_URL + "?async_fallback=True")
+url = make_url(DATABASE_URL).update_query_dict({"async_fallback": "True"})
+config.set_main_option(
+    "sqlalchemy.url", url.render_as_string(hide_password=False).replace("%", "%%")
+)
 
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
@@ -16,6 +22,14 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    """Секции wallet_operations создаются в базе, а не описаны в моделях"""
+
+    if type_ == "table" and reflected and compare_to is None:
+        return not name.startswith("wallet_operations_")
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -34,6 +48,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -54,7 +69,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
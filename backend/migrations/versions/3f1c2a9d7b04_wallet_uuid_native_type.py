@@ -0,0 +1,43 @@
+"""wallet uuid native type
+
+Revision ID: 3f1c2a9d7b04
+Revises: 8bdeecb8b176
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c2a9d7b04"
+down_revision: Union[str, Sequence[str], None] = "8bdeecb8b176"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        "wallets",
+        "uuid",
+        existing_type=sa.String(),
+        type_=postgresql.UUID(as_uuid=True),
+        existing_nullable=False,
+        postgresql_using="uuid::uuid",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        "wallets",
+        "uuid",
+        existing_type=postgresql.UUID(as_uuid=True),
+        type_=sa.String(),
+        existing_nullable=False,
+        postgresql_using="uuid::text",
+    )
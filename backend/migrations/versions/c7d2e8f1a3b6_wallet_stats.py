@@ -0,0 +1,108 @@
+"""wallet stats
+
+Revision ID: c7d2e8f1a3b6
+Revises: 9a4e6c1d2b57
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c7d2e8f1a3b6"
+down_revision: Union[str, Sequence[str], None] = "9a4e6c1d2b57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BUCKET_FUNCTION = """
+CREATE OR REPLACE FUNCTION wallet_balance_bucket(balance bigint) RETURNS smallint
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$ SELECT CASE WHEN balance <= 0 THEN 0 ELSE length(balance::text) END $$
+"""
+
+CAPTURE_FUNCTION = """
+CREATE OR REPLACE FUNCTION wallet_stats_capture() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO wallet_stats_deltas (bucket, wallets, total)
+        SELECT wallet_balance_bucket(balance), count(*), sum(balance)
+        FROM new_rows
+        GROUP BY 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO wallet_stats_deltas (bucket, wallets, total)
+        SELECT wallet_balance_bucket(balance), -count(*), -sum(balance)
+        FROM old_rows
+        GROUP BY 1;
+    ELSE
+        INSERT INTO wallet_stats_deltas (bucket, wallets, total)
+        SELECT bucket, sum(wallets), sum(total)
+        FROM (
+            SELECT wallet_balance_bucket(balance) AS bucket, 1 AS wallets,
+                   balance::numeric AS total
+            FROM new_rows
+            UNION ALL
+            SELECT wallet_balance_bucket(balance), -1, -balance::numeric
+            FROM old_rows
+        ) changes
+        GROUP BY bucket
+        HAVING sum(wallets) <> 0 OR sum(total) <> 0;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+TRIGGERS = {
+    "wallet_stats_insert": ("INSERT", "NEW TABLE AS new_rows"),
+    "wallet_stats_update": ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+    "wallet_stats_delete": ("DELETE", "OLD TABLE AS old_rows"),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "wallet_stats",
+        sa.Column("bucket", sa.SmallInteger(), nullable=False),
+        sa.Column("wallets", sa.BigInteger(), nullable=False),
+        sa.Column("total", sa.Numeric(), nullable=False),
+        sa.PrimaryKeyConstraint("bucket"),
+    )
+    op.create_table(
+        "wallet_stats_deltas",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("bucket", sa.SmallInteger(), nullable=False),
+        sa.Column("wallets", sa.BigInteger(), nullable=False),
+        sa.Column("total", sa.Numeric(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(BUCKET_FUNCTION)
+    op.execute(CAPTURE_FUNCTION)
+    # Триггеры блокируют запись в wallets до конца миграции, так что
+    # начальная сводка и изменения после неё не пересекаются
+    for name, (event, transition_tables) in TRIGGERS.items():
+        op.execute(
+            f"CREATE TRIGGER {name} AFTER {event} ON wallets "
+            f"REFERENCING {transition_tables} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION wallet_stats_capture()"
+        )
+    op.execute(
+        "INSERT INTO wallet_stats (bucket, wallets, total) "
+        "SELECT wallet_balance_bucket(balance), count(*), sum(balance) "
+        "FROM wallets GROUP BY 1"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER {name} ON wallets")
+    op.execute("DROP FUNCTION wallet_stats_capture()")
+    op.execute("DROP FUNCTION wallet_balance_bucket(bigint)")
+    op.drop_table("wallet_stats_deltas")
+    op.drop_table("wallet_stats")
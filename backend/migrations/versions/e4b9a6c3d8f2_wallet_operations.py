@@ -0,0 +1,113 @@
+"""wallet operations
+
+Revision ID: e4b9a6c3d8f2
+Revises: c7d2e8f1a3b6
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b9a6c3d8f2"
+down_revision: Union[str, Sequence[str], None] = "c7d2e8f1a3b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Секции по месяцам UTC от текущего до months_ahead вперёд. Ошибка одного
+# месяца не мешает создать остальные.
+CREATE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION wallet_operations_create_partitions(months_ahead int)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start timestamp := date_trunc('month', now() AT TIME ZONE 'UTC');
+    month timestamp;
+    partition_start timestamptz;
+    partition_end timestamptz;
+    partition_name text;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        month := month_start + make_interval(months => i);
+        partition_start := month AT TIME ZONE 'UTC';
+        partition_end := (month + interval '1 month') AT TIME ZONE 'UTC';
+        partition_name := 'wallet_operations_' || to_char(month, 'YYYY_MM');
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+        BEGIN
+            BEGIN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF wallet_operations '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, partition_start, partition_end
+                );
+            EXCEPTION WHEN check_violation THEN
+                -- В секции по умолчанию уже есть строки этого месяца: они
+                -- переносятся в новую таблицу, и она подключается секцией
+                LOCK TABLE wallet_operations_default IN ACCESS EXCLUSIVE MODE;
+                EXECUTE format(
+                    'CREATE TABLE %I (LIKE wallet_operations INCLUDING DEFAULTS)',
+                    partition_name
+                );
+                EXECUTE format(
+                    'WITH moved AS ('
+                    '    DELETE FROM wallet_operations_default'
+                    '    WHERE created_at >= %L AND created_at < %L RETURNING *'
+                    ') INSERT INTO %I SELECT * FROM moved',
+                    partition_start, partition_end, partition_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE wallet_operations ATTACH PARTITION %I '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, partition_start, partition_end
+                );
+            END;
+        EXCEPTION WHEN OTHERS THEN
+            -- Остальные месяцы всё равно создаются
+            RAISE WARNING 'wallet_operations: секция % не создана: %',
+                partition_name, SQLERRM;
+        END;
+    END LOOP;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "wallet_operations",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("wallet_uuid", sa.Uuid(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("operation_type", sa.String(), nullable=False),
+        sa.Column("amount", sa.BigInteger(), nullable=False),
+        sa.Column("balance", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "wallet_uuid",
+            "created_at",
+            "id",
+            postgresql_include=["operation_type", "amount", "balance"],
+        ),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.execute(CREATE_PARTITIONS_FUNCTION)
+    op.execute("SELECT wallet_operations_create_partitions(3)")
+    op.execute(
+        "CREATE TABLE wallet_operations_default "
+        "PARTITION OF wallet_operations DEFAULT"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("wallet_operations")
+    op.execute("DROP FUNCTION wallet_operations_create_partitions(int)")
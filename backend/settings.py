@@ -0,0 +1,148 @@
+import logging
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+@dataclass
+class Settings:
+    """Настройки приложения из переменных окружения"""
+
+    database_url: str
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout: float
+    db_pool_recycle: int
+    db_read_pool_size: int
+    db_read_max_overflow: int
+    db_read_pool_timeout: float
+    db_backend: str
+    replica_database_url: Optional[str]
+    replica_max_lag: float
+    replica_check_interval: float
+    replica_connect_timeout: float
+    workers: int
+    server_loop: str
+    server_http: str
+    wallet_batching: bool
+    wallet_batch_window_ms: float
+    wallet_batch_max_size: int
+    balance_cache: bool
+    balance_cache_size: int
+    balance_cache_ttl: float
+    lock_strategy: str
+    row_lock_striping: bool
+    row_lock_stripes: int
+    lock_stats: bool
+    lock_stats_size: int
+    idempotency_ttl: float
+    idempotency_cache_size: int
+    idempotency_cleanup_interval: float
+    wallet_stats_fold_interval: float
+    operations_partitions_ahead: int
+    operations_partition_interval: float
+    lock_timeout_ms: int
+    statement_timeout_ms: int
+    retry_after: int
+    sql_profiling: bool
+    sql_profiling_log: bool
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        workers = max(1, _env_int("WORKERS", 1))
+        balance_cache = _env_bool("BALANCE_CACHE", False)
+        if balance_cache and workers > 1:
+            # Кэш живёт в памяти процесса: запись в одном воркере не сбросит
+            # его в остальных, и они отдавали бы старый баланс до BALANCE_CACHE_TTL
+            logger.warning("BALANCE_CACHE выключен: он не работает при WORKERS > 1")
+            balance_cache = False
+
+        return cls(
+            database_url=os.getenv(
+                "DATABASE_URL",
+                "postgresql+asyncpg://postgres:postgres@db:5432/postgres",
+            ),
+            db_pool_size=_env_int("DB_POOL_SIZE", 24),
+            db_max_overflow=_env_int("DB_MAX_OVERFLOW", 40),
+            db_pool_timeout=_env_float("DB_POOL_TIMEOUT", 30.0),
+            db_pool_recycle=_env_int("DB_POOL_RECYCLE", -1),
+            db_read_pool_size=_env_int("DB_READ_POOL_SIZE", 8),
+            db_read_max_overflow=_env_int("DB_READ_MAX_OVERFLOW", 8),
+            db_read_pool_timeout=_env_float("DB_READ_POOL_TIMEOUT", 5.0),
+            db_backend=os.getenv("DB_BACKEND", "sqlalchemy"),
+            replica_database_url=os.getenv("REPLICA_DATABASE_URL") or None,
+            replica_max_lag=_env_float("REPLICA_MAX_LAG", 1.0),
+            replica_check_interval=_env_float("REPLICA_CHECK_INTERVAL", 1.0),
+            replica_connect_timeout=_env_float("REPLICA_CONNECT_TIMEOUT", 1.0),
+            workers=workers,
+            server_loop=os.getenv("SERVER_LOOP", "auto"),
+            server_http=os.getenv("SERVER_HTTP", "auto"),
+            wallet_batching=_env_bool("WALLET_BATCHING", False),
+            wallet_batch_window_ms=_env_float("WALLET_BATCH_WINDOW_MS", 2.0),
+            wallet_batch_max_size=_env_int("WALLET_BATCH_MAX_SIZE", 100),
+            balance_cache=balance_cache,
+            balance_cache_size=_env_int("BALANCE_CACHE_SIZE", 10_000),
+            balance_cache_ttl=_env_float("BALANCE_CACHE_TTL", 5.0),
+            lock_strategy=os.getenv("LOCK_STRATEGY", "for_update"),
+            row_lock_striping=_env_bool("ROW_LOCK_STRIPING", False),
+            row_lock_stripes=_env_int("ROW_LOCK_STRIPES", 1024),
+            lock_stats=_env_bool("LOCK_STATS", True),
+            lock_stats_size=_env_int("LOCK_STATS_SIZE", 10_000),
+            idempotency_ttl=_env_float("IDEMPOTENCY_TTL", 24 * 60 * 60),
+            idempotency_cache_size=_env_int("IDEMPOTENCY_CACHE_SIZE", 10_000),
+            idempotency_cleanup_interval=_env_float(
+                "IDEMPOTENCY_CLEANUP_INTERVAL", 10 * 60
+            ),
+            wallet_stats_fold_interval=_env_float("WALLET_STATS_FOLD_INTERVAL", 1.0),
+            operations_partitions_ahead=_env_int("OPERATIONS_PARTITIONS_AHEAD", 3),
+            operations_partition_interval=_env_float(
+                "OPERATIONS_PARTITION_INTERVAL", 6 * 60 * 60
+            ),
+            lock_timeout_ms=_env_int("LOCK_TIMEOUT_MS", 0),
+            statement_timeout_ms=_env_int("STATEMENT_TIMEOUT_MS", 0),
+            retry_after=_env_int("RETRY_AFTER", 1),
+            sql_profiling=_env_bool("SQL_PROFILING", False),
+            sql_profiling_log=_env_bool("SQL_PROFILING_LOG", False),
+        )
+
+    @property
+    def worker_pool_size(self) -> int:
+        """Пул одного воркера: DB_POOL_SIZE делится между всеми воркерами"""
+        return max(1, self.db_pool_size // self.workers)
+
+    @property
+    def worker_max_overflow(self) -> int:
+        return self.db_max_overflow // self.workers
+
+    @property
+    def worker_read_pool_size(self) -> int:
+        """Пул чтения одного воркера, 0 - чтения идут через общий пул"""
+        if self.db_read_pool_size <= 0:
+            return 0
+        return max(1, self.db_read_pool_size // self.workers)
+
+    @property
+    def worker_read_max_overflow(self) -> int:
+        return self.db_read_max_overflow // self.workers
+
+
+settings = Settings.from_env()
@@ -81,22 +81,42 @@ function createAccount() {
   executeQueryAndShowData('POST', query);
 }
 
+function renderAccountPage(page) {
+  page.items.forEach(wallet => {
+    const item = document.createElement('div');
+    item.className = 'account-item';
+    item.textContent = `${wallet.wallet_id} - ${wallet.balance} 'денег'`;
+    item.addEventListener('click', () => {
+      walletInput.value = wallet.wallet_id;
+      amountInput.value = wallet.balance;
+    });
+    accountsList.appendChild(item);
+  });
+
+  if (page.next_cursor) {
+    const more = document.createElement('div');
+    more.className = 'account-item';
+    more.textContent = 'Показать ещё';
+    more.addEventListener('click', async () => {
+      more.remove();
+      const data = await executeQueryAndShowData(
+        'GET', baseQuery.view().where({ cursor: page.next_cursor })
+      );
+      if (data && Array.isArray(data.items)) {
+        renderAccountPage(data);
+      }
+    });
+    accountsList.appendChild(more);
+  }
+}
+
 async function getAccountList() {
   const data = await executeQueryAndShowData('GET', baseQuery.view());
   
   accountsList.innerHTML = '';
   
-  if (data && Array.isArray(data)) {
-    data.forEach(wallet => {
-      const item = document.createElement('div');
-      item.className = 'account-item';
-      item.textContent = `${wallet.wallet_id} - ${wallet.balance} 'денег'`;
-      item.addEventListener('click', () => {
-        walletInput.value = wallet.wallet_id;
-        amountInput.value = wallet.balance;
-      });
-      accountsList.appendChild(item);
-    });
+  if (data && Array.isArray(data.items)) {
+    renderAccountPage(data);
   }
 }
 
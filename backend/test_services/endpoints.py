@@ -1,6 +1,15 @@
 WALLETS = "api/v1/wallets/"
+WALLETS_BULK = "api/v1/wallets/bulk"
+WALLETS_CACHE_STATS = "api/v1/wallets/cache/stats"
+WALLETS_LOCKS_STATS = "api/v1/wallets/locks/stats"
+WALLETS_LOCKS_HOT = "api/v1/wallets/locks/hot"
+WALLETS_AGGREGATES = "api/v1/wallets/aggregates"
+WALLETS_EXPORT = "api/v1/wallets/export"
+WALLETS_OPERATIONS_BATCH = "api/v1/wallets/operations:batch"
+METRICS = "metrics"
 WALLET_BY_ID = "api/v1/wallets/{wallet_id}"
 WALLET_OPERATION = "api/v1/wallets/{wallet_id}/operation"
+WALLET_OPERATIONS = "api/v1/wallets/{wallet_id}/operations"
 
 
 def wallet_by_id(wallet_id: str) -> str:
@@ -9,3 +18,7 @@ def wallet_by_id(wallet_id: str) -> str:
 
 def wallet_operation(wallet_id: str) -> str:
     return WALLET_OPERATION.format(wallet_id=wallet_id)
+
+
+def wallet_operations(wallet_id: str) -> str:
+    return WALLET_OPERATIONS.format(wallet_id=wallet_id)
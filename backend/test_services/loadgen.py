@@ -0,0 +1,220 @@
+"""
+Генератор нагрузки на запущенный сервер через WalletManager.
+
+    python -m test_services.loadgen --base-url http://localhost:5051
+        --concurrency 50 --duration 30
+        --mix deposit=40,withdraw=20,read=35,create=5
+        --wallets 1000 --keys zipf --json report.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from bisect import bisect_left
+from dataclasses import asdict, dataclass, field
+from itertools import accumulate
+from typing import Any, Optional
+
+import httpx
+from test_services.manager import WalletManager
+from test_services.stats import LatencyRecorder, format_table
+
+KINDS = ("deposit", "withdraw", "read", "create")
+BULK_CREATE_LIMIT = 100_000
+
+
+@dataclass
+class LoadConfig:
+    concurrency: int = 10
+    duration: float = 10.0
+    mix: dict[str, float] = field(
+        default_factory=lambda: {"deposit": 40, "withdraw": 20, "read": 40}
+    )
+    wallets: int = 100
+    keys: str = "uniform"
+    zipf_s: float = 1.1
+    amount: int = 1
+    initial_balance: int = 1_000_000
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise argparse.ArgumentTypeError(f"Неизвестный тип запроса: {kind}")
+        mix[kind] = float(weight)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("Все веса нулевые")
+    return mix
+
+
+class KeyChooser:
+    """
+    Выбор кошелька для запроса: равномерно или по закону Ципфа, где
+    кошелёк с рангом k выбирается с весом 1 / k^s - несколько горячих
+    ключей и длинный хвост.
+    """
+
+    def __init__(self, keys: list[str], distribution: str, zipf_s: float):
+        self.keys = keys
+        self._cumulative = None
+        if distribution == "zipf":
+            weights = (1 / rank**zipf_s for rank in range(1, len(keys) + 1))
+            self._cumulative = list(accumulate(weights))
+
+    def choose(self) -> str:
+        if self._cumulative is None:
+            return random.choice(self.keys)
+        point = random.random() * self._cumulative[-1]
+        return self.keys[min(bisect_left(self._cumulative, point), len(self.keys) - 1)]
+
+
+async def create_wallets(
+    wallet_manager: WalletManager, count: int, balance: int
+) -> list[str]:
+    wallet_ids = []
+    for start in range(0, count, BULK_CREATE_LIMIT):
+        size = min(BULK_CREATE_LIMIT, count - start)
+        response = await wallet_manager.post_wallets_bulk(
+            json={"balances": [balance] * size}
+        )
+        response.raise_for_status()
+        wallet_ids.extend(wallet["wallet_id"] for wallet in response.json())
+    return wallet_ids
+
+
+async def _request(
+    wallet_manager: WalletManager, kind: str, keys: KeyChooser, amount: int
+) -> httpx.Response:
+    if kind == "create":
+        return await wallet_manager.post_wallets(json={})
+    if kind == "read":
+        return await wallet_manager.get_wallet(keys.choose())
+    return await wallet_manager.post_wallet_operation(
+        keys.choose(), json={"operation_type": kind.upper(), "amount": amount}
+    )
+
+
+async def _worker(
+    wallet_manager: WalletManager,
+    config: LoadConfig,
+    keys: KeyChooser,
+    deadline: float,
+    recorders: dict[str, LatencyRecorder],
+) -> None:
+    kinds = list(config.mix)
+    cumulative = list(accumulate(config.mix.values()))
+
+    while time.perf_counter() < deadline:
+        kind = random.choices(kinds, cum_weights=cumulative)[0]
+        error = None
+        start = time.perf_counter()
+        try:
+            response = await _request(wallet_manager, kind, keys, config.amount)
+            if response.status_code >= 400:
+                error = str(response.status_code)
+        except httpx.HTTPError as e:
+            error = type(e).__name__
+        recorders[kind].add(time.perf_counter() - start, error)
+
+
+async def run_load(
+    wallet_manager: WalletManager,
+    config: LoadConfig,
+    wallet_ids: Optional[list[str]] = None,
+) -> dict[str, Any]:
+    """Нагрузка по config, результат - сводка по каждому типу запроса и общая"""
+
+    if wallet_ids is None:
+        wallet_ids = await create_wallets(
+            wallet_manager, config.wallets, config.initial_balance
+        )
+    keys = KeyChooser(wallet_ids, config.keys, config.zipf_s)
+    recorders = {kind: LatencyRecorder() for kind in config.mix}
+
+    start = time.perf_counter()
+    deadline = start + config.duration
+    await asyncio.gather(
+        *(
+            _worker(wallet_manager, config, keys, deadline, recorders)
+            for _ in range(config.concurrency)
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    total = LatencyRecorder()
+    for recorder in recorders.values():
+        total.merge(recorder)
+
+    return {
+        "config": asdict(config),
+        "elapsed": elapsed,
+        "total": total.summary(elapsed),
+        "by_kind": {
+            kind: recorder.summary(elapsed) for kind, recorder in recorders.items()
+        },
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:5051")
+    parser.add_argument("--concurrency", type=int, default=LoadConfig.concurrency)
+    parser.add_argument(
+        "--duration", type=float, default=LoadConfig.duration, help="секунды"
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=LoadConfig().mix,
+        help="веса запросов, например deposit=40,withdraw=20,read=35,create=5",
+    )
+    parser.add_argument(
+        "--wallets", type=int, default=LoadConfig.wallets, help="сколько создать"
+    )
+    parser.add_argument("--keys", choices=("uniform", "zipf"), default="uniform")
+    parser.add_argument("--zipf-s", type=float, default=LoadConfig.zipf_s)
+    parser.add_argument("--amount", type=int, default=LoadConfig.amount)
+    parser.add_argument(
+        "--initial-balance", type=int, default=LoadConfig.initial_balance
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--json", help="куда записать отчёт в JSON, - для stdout")
+    args = parser.parse_args(argv)
+
+    config = LoadConfig(
+        concurrency=args.concurrency,
+        duration=args.duration,
+        mix=args.mix,
+        wallets=args.wallets,
+        keys=args.keys,
+        zipf_s=args.zipf_s,
+        amount=args.amount,
+        initial_balance=args.initial_balance,
+    )
+
+    async def run() -> dict[str, Any]:
+        limits = httpx.Limits(max_connections=config.concurrency)
+        async with httpx.AsyncClient(
+            base_url=args.base_url, timeout=args.timeout, limits=limits
+        ) as client:
+            return await run_load(WalletManager(client), config)
+
+    report = asyncio.run(run())
+
+    rows = {**report["by_kind"], "total": report["total"]}
+    print(format_table(rows), file=sys.stderr if args.json == "-" else sys.stdout)
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+    elif args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,16 @@ from dataclasses import dataclass
 from typing import Any, Optional
 
 import httpx
-from test_services.endpoints import WALLETS, wallet_by_id, wallet_operation
+from test_services.endpoints import (METRICS, WALLETS, WALLETS_AGGREGATES,
+                                     WALLETS_BULK, WALLETS_CACHE_STATS,
+                                     WALLETS_EXPORT, WALLETS_LOCKS_HOT,
+                                     WALLETS_LOCKS_STATS,
+                                     WALLETS_OPERATIONS_BATCH, wallet_by_id,
+                                     wallet_operation, wallet_operations)
 
 JsonDict = dict[str, Any]
 QueryDict = dict[str, Any]
+HeaderDict = dict[str, str]
 
 
 @dataclass(frozen=True)
@@ -15,17 +21,56 @@ class WalletManager:
     client: httpx.AsyncClient
 
     async def get_wallets(
-        self, *, params: Optional[QueryDict] = None
+        self,
+        *,
+        params: Optional[QueryDict] = None,
+        headers: Optional[HeaderDict] = None,
     ) -> httpx.Response:
-        return await self.client.get(WALLETS, params=params)
+        return await self.client.get(WALLETS, params=params, headers=headers)
 
     async def post_wallets(self, *, json: Optional[JsonDict] = None) -> httpx.Response:
         return await self.client.post(WALLETS, json=json if json is not None else {})
 
+    async def post_wallets_bulk(
+        self, *, json: JsonDict, headers: Optional[HeaderDict] = None
+    ) -> httpx.Response:
+        return await self.client.post(WALLETS_BULK, json=json, headers=headers)
+
+    async def get_wallets_cache_stats(self) -> httpx.Response:
+        return await self.client.get(WALLETS_CACHE_STATS)
+
+    async def get_wallets_locks_stats(self) -> httpx.Response:
+        return await self.client.get(WALLETS_LOCKS_STATS)
+
+    async def get_wallets_locks_hot(
+        self, *, params: Optional[QueryDict] = None
+    ) -> httpx.Response:
+        return await self.client.get(WALLETS_LOCKS_HOT, params=params)
+
+    async def get_wallets_aggregates(self) -> httpx.Response:
+        return await self.client.get(WALLETS_AGGREGATES)
+
+    async def get_wallets_export(
+        self, *, params: Optional[QueryDict] = None
+    ) -> httpx.Response:
+        return await self.client.get(WALLETS_EXPORT, params=params)
+
+    async def post_wallets_operations_batch(self, *, json: JsonDict) -> httpx.Response:
+        return await self.client.post(WALLETS_OPERATIONS_BATCH, json=json)
+
+    async def get_metrics(self) -> httpx.Response:
+        return await self.client.get(METRICS)
+
     async def get_wallet(
-        self, wallet_id: str, *, params: Optional[QueryDict] = None
+        self,
+        wallet_id: str,
+        *,
+        params: Optional[QueryDict] = None,
+        headers: Optional[HeaderDict] = None,
     ) -> httpx.Response:
-        return await self.client.get(wallet_by_id(wallet_id), params=params)
+        return await self.client.get(
+            wallet_by_id(wallet_id), params=params, headers=headers
+        )
 
     async def post_wallet_operation(
         self,
@@ -33,7 +78,13 @@ class WalletManager:
         *,
         json: JsonDict,
         params: Optional[QueryDict] = None,
+        headers: Optional[HeaderDict] = None,
     ) -> httpx.Response:
         return await self.client.post(
-            wallet_operation(wallet_id), json=json, params=params
+            wallet_operation(wallet_id), json=json, params=params, headers=headers
         )
+
+    async def get_wallet_operations(
+        self, wallet_id: str, *, params: Optional[QueryDict] = None
+    ) -> httpx.Response:
+        return await self.client.get(wallet_operations(wallet_id), params=params)
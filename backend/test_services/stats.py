@@ -0,0 +1,73 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Optional, Sequence
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Перцентиль q (0..100) по отсортированной выборке, метод ближайшего ранга"""
+
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+@dataclass
+class LatencyRecorder:
+    """Время ответа и ошибки одной группы запросов"""
+
+    latencies: list[float] = field(default_factory=list)
+    errors: Counter = field(default_factory=Counter)
+
+    def add(self, latency: float, error: Optional[str] = None) -> None:
+        self.latencies.append(latency)
+        if error is not None:
+            self.errors[error] += 1
+
+    def merge(self, other: "LatencyRecorder") -> None:
+        self.latencies.extend(other.latencies)
+        self.errors.update(other.errors)
+
+    def summary(self, elapsed: float) -> dict[str, Any]:
+        latencies = sorted(self.latencies)
+        requests = len(latencies)
+        errors = sum(self.errors.values())
+        return {
+            "requests": requests,
+            "rps": requests / elapsed if elapsed else 0.0,
+            "errors": dict(self.errors),
+            "error_rate": errors / requests if requests else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p90_ms": percentile(latencies, 90) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        }
+
+
+def format_table(rows: dict[str, dict[str, Any]]) -> str:
+    """Сводки summary() таблицей, по строке на группу"""
+
+    header = ("", "requests", "rps", "err %", "p50 ms", "p90 ms", "p99 ms", "max ms")
+    lines = [header]
+    for name, row in rows.items():
+        lines.append(
+            (
+                name,
+                str(row["requests"]),
+                f"{row['rps']:.1f}",
+                f"{row['error_rate'] * 100:.2f}",
+                f"{row['p50_ms']:.1f}",
+                f"{row['p90_ms']:.1f}",
+                f"{row['p99_ms']:.1f}",
+                f"{row['max_ms']:.1f}",
+            )
+        )
+
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    return "\n".join(
+        "  ".join(
+            cell.ljust(width) if i == 0 else cell.rjust(width)
+            for i, (cell, width) in enumerate(zip(line, widths))
+        )
+        for line in lines
+    )
@@ -0,0 +1,141 @@
+import random
+import uuid
+
+import pytest
+from database.locking import acquire_lock
+from database.models.wallet import Wallet
+from database.queries.wallet import MAX_BALANCE
+from settings import settings
+from test_services.manager import WalletManager
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+@pytest.fixture(autouse=True)
+def asyncpg_backend(monkeypatch):
+    monkeypatch.setattr(settings, "db_backend", "asyncpg")
+
+
+@pytest.fixture
+async def wallet_id(wallet_manager):
+    """Новый кошелёк с балансом 10"""
+
+    response = await wallet_manager.post_wallets(json={})
+    wallet_id = response.json()["wallet_id"]
+    await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "DEPOSIT", "amount": 10}
+    )
+    return wallet_id
+
+
+async def test_operations(wallet_manager, wallet_id):
+    """Позитивная проверка: пополнение, списание и чтение баланса"""
+
+    response = await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "WITHDRAW", "amount": 4}
+    )
+    assert response.status_code == 200
+    assert response.json()["new_balance"] == 6
+
+    response = await wallet_manager.get_wallet(wallet_id)
+    assert response.status_code == 200
+    assert response.json() == {"wallet_id": wallet_id, "balance": 6}
+
+
+async def test_operation_errors(wallet_manager, wallet_id):
+    """Негативная проверка: нехватка средств, переполнение и чужой кошелёк"""
+
+    response = await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "WITHDRAW", "amount": 11}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Недостаточно средств"
+
+    response = await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "DEPOSIT", "amount": MAX_BALANCE}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == (
+        "Баланс превышает максимально допустимое значение"
+    )
+
+    missing = str(uuid.uuid4())
+    response = await wallet_manager.post_wallet_operation(
+        missing, json={"operation_type": "DEPOSIT", "amount": 1}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"Record not found: {missing}"
+
+    response = await wallet_manager.get_wallet(missing)
+    assert response.status_code == 404
+
+
+async def test_idempotent_operation_uses_orm(wallet_manager, wallet_id):
+    """Операция с ключом идемпотентности работает и с этим бэкендом"""
+
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    json = {"operation_type": "DEPOSIT", "amount": 5}
+
+    first = await wallet_manager.post_wallet_operation(
+        wallet_id, json=json, headers=headers
+    )
+    second = await wallet_manager.post_wallet_operation(
+        wallet_id, json=json, headers=headers
+    )
+
+    assert first.json() == second.json()
+    response = await wallet_manager.get_wallet(wallet_id)
+    assert response.json()["balance"] == 15
+
+
+async def test_lock_timeout_returns_409(
+    wallet_manager, session_factory, wallet_id, monkeypatch
+):
+    """lock_timeout из настроек действует и на prepared statement"""
+
+    monkeypatch.setattr(settings, "lock_timeout_ms", 100)
+
+    async with session_factory() as holder:
+        async with acquire_lock(holder, Wallet, uuid.UUID(wallet_id), "uuid"):
+            response = await wallet_manager.post_wallet_operation(
+                wallet_id, json={"operation_type": "DEPOSIT", "amount": 1}
+            )
+
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize("with_filters", [False, True])
+async def test_list_pagination(wallet_manager, with_filters):
+    """Позитивная проверка: страницы совпадают с бэкендом SQLAlchemy"""
+
+    balance = random.randint(10**9, 10**12)
+    for _ in range(5):
+        create_response = await wallet_manager.post_wallets(json={})
+        await wallet_manager.post_wallet_operation(
+            create_response.json()["wallet_id"],
+            json={"operation_type": "DEPOSIT", "amount": balance},
+        )
+
+    params = {"limit": 2}
+    if with_filters:
+        params.update(min_balance=balance, max_balance=balance)
+
+    pages = {}
+    for backend in ("asyncpg", "sqlalchemy"):
+        settings.db_backend = backend
+        pages[backend] = []
+        cursor = None
+        for _ in range(3):
+            response = await wallet_manager.get_wallets(
+                params={**params, "cursor": cursor} if cursor else params
+            )
+            assert response.status_code == 200
+            pages[backend].append(response.json())
+            cursor = response.json()["next_cursor"]
+
+    assert pages["asyncpg"] == pages["sqlalchemy"]
+    if with_filters:
+        assert [len(page["items"]) for page in pages["asyncpg"]] == [2, 2, 1]
@@ -0,0 +1,105 @@
+import uuid
+
+import pytest
+from database.cache import BalanceCache
+from settings import settings
+from test_services.manager import WalletManager
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+@pytest.fixture
+def cache_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "balance_cache", True)
+
+
+async def test_cached_balance_follows_operations(wallet_manager, cache_enabled):
+    """Баланс из кэша не отстаёт от собственных операций клиента"""
+
+    create_response = await wallet_manager.post_wallets(json={})
+    wallet_id = create_response.json()["wallet_id"]
+
+    stats_before = (await wallet_manager.get_wallets_cache_stats()).json()
+
+    first = await wallet_manager.get_wallet(wallet_id)
+    second = await wallet_manager.get_wallet(wallet_id)
+
+    stats_after = (await wallet_manager.get_wallets_cache_stats()).json()
+
+    assert first.json()["balance"] == second.json()["balance"] == 0
+    assert stats_after["enabled"] is True
+    assert stats_after["misses"] == stats_before["misses"] + 1
+    assert stats_after["hits"] == stats_before["hits"] + 1
+
+    for amount, expected_balance in ((5, 5), (7, 12)):
+        await wallet_manager.post_wallet_operation(
+            wallet_id, json={"operation_type": "DEPOSIT", "amount": amount}
+        )
+        response = await wallet_manager.get_wallet(wallet_id)
+        assert response.json()["balance"] == expected_balance
+
+    await wallet_manager.post_wallets_operations_batch(
+        json={
+            "operations": [
+                {"wallet_id": wallet_id, "operation_type": "WITHDRAW", "amount": 2}
+            ]
+        }
+    )
+    response = await wallet_manager.get_wallet(wallet_id)
+    assert response.json()["balance"] == 10
+
+
+async def test_cache_disabled_by_default(wallet_manager):
+    """Без настройки кэш не используется"""
+
+    response = await wallet_manager.get_wallets_cache_stats()
+
+    assert response.status_code == 200
+    assert response.json()["enabled"] is settings.balance_cache
+
+
+def test_cache_lru_eviction():
+    """Кэш вытесняет давно не читанные ключи"""
+
+    cache = BalanceCache(max_size=2, ttl=60)
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    cache.fill(first, 1, cache.token())
+    cache.fill(second, 2, cache.token())
+    assert cache.get(first) == 1
+    cache.fill(third, 3, cache.token())
+
+    assert cache.get(second) is None
+    assert cache.get(first) == 1
+    assert cache.get(third) == 3
+    assert cache.evictions == 1
+
+
+def test_cache_ttl():
+    """Запись старше TTL не отдаётся"""
+
+    cache = BalanceCache(max_size=10, ttl=0)
+    key = uuid.uuid4()
+
+    cache.fill(key, 1, cache.token())
+
+    assert cache.get(key) is None
+
+
+def test_cache_rejects_fill_started_before_invalidate():
+    """Чтение, начатое до изменения баланса, не кладёт старое значение"""
+
+    cache = BalanceCache(max_size=10, ttl=60)
+    key = uuid.uuid4()
+
+    token = cache.token()
+    cache.invalidate(key)
+    cache.fill(key, 1, token)
+
+    assert cache.get(key) is None
+
+    cache.fill(key, 2, cache.token())
+    assert cache.get(key) == 2
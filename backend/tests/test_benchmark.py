@@ -0,0 +1,23 @@
+from test_services.benchmark import STRATEGIES, format_report, run_matrix
+
+
+async def test_benchmark_matrix(session_factory):
+    """Короткий прогон всех стратегий на одном горячем кошельке"""
+
+    results = await run_matrix(
+        session_factory,
+        list(STRATEGIES),
+        wallet_counts=[1, 10],
+        concurrency_levels=[4],
+        read_ratios=[0.5],
+        duration=0.2,
+    )
+
+    assert len(results) == 2 * len(STRATEGIES)
+    for result in results:
+        assert result["requests"] > 0
+        assert result["errors"] == {}
+        assert result["deadlocks"] == 0
+
+    report = format_report(results)
+    assert "optimistic w=1 c=4 r=0.5" in report
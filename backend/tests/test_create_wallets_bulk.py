@@ -0,0 +1,70 @@
+import pytest
+from test_services.manager import WalletManager
+from tests.utils.assertions import assert_wallet
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+async def test_create_wallets_bulk_count(wallet_manager):
+    """Позитивная проверка: создание заданного количества кошельков"""
+
+    response = await wallet_manager.post_wallets_bulk(json={"count": 5})
+    response_json = response.json()
+
+    assert response.status_code == 201
+    assert len(response_json) == 5
+    assert len({w["wallet_id"] for w in response_json}) == 5
+    for wallet in response_json:
+        assert_wallet(wallet)
+        assert wallet["balance"] == 0
+
+
+async def test_create_wallets_bulk_balances(wallet_manager):
+    """Позитивная проверка: создание кошельков с начальными балансами"""
+
+    balances = [0, 10, 2**63 - 1]
+
+    response = await wallet_manager.post_wallets_bulk(json={"balances": balances})
+    response_json = response.json()
+
+    assert response.status_code == 201
+    assert [w["balance"] for w in response_json] == balances
+
+    for wallet in response_json:
+        get_response = await wallet_manager.get_wallet(wallet["wallet_id"])
+        assert get_response.json()["balance"] == wallet["balance"]
+
+
+async def test_create_wallets_bulk_copy(wallet_manager):
+    """Позитивная проверка: большой пакет создаётся через COPY"""
+
+    response = await wallet_manager.post_wallets_bulk(json={"count": 20_000})
+    response_json = response.json()
+
+    assert response.status_code == 201
+    assert len(response_json) == 20_000
+
+    get_response = await wallet_manager.get_wallet(response_json[-1]["wallet_id"])
+    assert get_response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {},
+        {"count": 1, "balances": [1]},
+        {"count": 0},
+        {"balances": []},
+        {"balances": [-1]},
+    ],
+    ids=["empty", "count_and_balances", "zero_count", "empty_balances", "negative"],
+)
+async def test_create_wallets_bulk_invalid(wallet_manager, payload):
+    """Негативная проверка: некорректный запрос массового создания"""
+
+    response = await wallet_manager.post_wallets_bulk(json=payload)
+
+    assert response.status_code == 422
@@ -0,0 +1,51 @@
+import pytest
+from test_services.loadgen import KeyChooser, LoadConfig, run_load
+from test_services.manager import WalletManager
+from test_services.stats import percentile
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+def test_percentile():
+    values = [float(i) for i in range(1, 101)]
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([], 99) == 0
+
+
+def test_zipf_keys_prefer_first_ranks():
+    """Ципф: первый ключ выбирается заметно чаще последнего"""
+
+    keys = [str(i) for i in range(100)]
+    chooser = KeyChooser(keys, "zipf", 1.1)
+    chosen = [chooser.choose() for _ in range(10_000)]
+
+    assert chosen.count("0") > 10 * chosen.count("99")
+
+
+async def test_run_load_report(wallet_manager):
+    """Позитивная проверка: короткий прогон даёт сводку по каждому типу запроса"""
+
+    config = LoadConfig(
+        concurrency=4,
+        duration=0.5,
+        mix={"deposit": 1, "withdraw": 1, "read": 1, "create": 1},
+        wallets=5,
+        keys="zipf",
+    )
+
+    report = await run_load(wallet_manager, config)
+
+    assert set(report["by_kind"]) == {"deposit", "withdraw", "read", "create"}
+    assert report["total"]["requests"] == sum(
+        row["requests"] for row in report["by_kind"].values()
+    )
+    assert report["total"]["requests"] > 0
+    assert report["total"]["error_rate"] == 0
+    assert report["total"]["p50_ms"] <= report["total"]["p99_ms"]
+    assert report["total"]["p99_ms"] <= report["total"]["max_ms"]
@@ -0,0 +1,94 @@
+import asyncio
+import uuid
+
+import pytest
+from database.exceptions import RecordLockedError
+from database.locking import LockStrategy, acquire_lock, lock_contention
+from database.models.wallet import Wallet
+from database.queries.wallet import update_wallet_balance_locked
+from test_services.manager import WalletManager
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+@pytest.fixture
+async def wallet_uuid(wallet_manager):
+    response = await wallet_manager.post_wallets(json={})
+    return uuid.UUID(response.json()["wallet_id"])
+
+
+async def test_operations_counted_per_wallet(wallet_manager, wallet_uuid):
+    """Каждая операция над кошельком учитывается в его статистике"""
+
+    for _ in range(3):
+        await wallet_manager.post_wallet_operation(
+            str(wallet_uuid), json={"operation_type": "DEPOSIT", "amount": 1}
+        )
+
+    entry = lock_contention.get(Wallet, wallet_uuid)
+    assert entry.acquired == 3
+    assert entry.failed == 0
+    assert entry.hold_total > 0
+
+
+async def test_wait_and_hold_measured_separately(session_factory, wallet_uuid):
+    """Ожидание занятой строки и удержание считаются отдельно"""
+
+    async with session_factory() as holder, session_factory() as db:
+        async with acquire_lock(holder, Wallet, wallet_uuid, "uuid"):
+            waiter = asyncio.create_task(
+                update_wallet_balance_locked(
+                    db, wallet_uuid, "DEPOSIT", 1, strategy=LockStrategy.FOR_UPDATE
+                )
+            )
+            await asyncio.sleep(0.3)
+        await waiter
+
+    entry = lock_contention.get(Wallet, wallet_uuid)
+    assert entry.acquired == 2
+    assert entry.wait_max >= 0.25
+    assert entry.hold_max >= 0.25
+    assert entry.wait_max < entry.wait_total + entry.hold_total
+
+
+async def test_failed_lock_counted(session_factory, wallet_uuid):
+    """Не полученная блокировка учитывается как неудачная"""
+
+    async with session_factory() as holder, session_factory() as db:
+        async with acquire_lock(holder, Wallet, wallet_uuid, "uuid"):
+            with pytest.raises(RecordLockedError):
+                async with acquire_lock(
+                    db, Wallet, wallet_uuid, "uuid", strategy=LockStrategy.NOWAIT
+                ):
+                    pass
+
+    entry = lock_contention.get(Wallet, wallet_uuid)
+    assert entry.acquired == 1
+    assert entry.failed == 1
+
+
+async def test_hottest_wallets(wallet_manager, session_factory, wallet_uuid):
+    """Позитивная проверка: кошельки отсортированы по суммарному ожиданию"""
+
+    async with session_factory() as holder:
+        async with acquire_lock(holder, Wallet, wallet_uuid, "uuid"):
+            operation = asyncio.create_task(
+                wallet_manager.post_wallet_operation(
+                    str(wallet_uuid), json={"operation_type": "DEPOSIT", "amount": 1}
+                )
+            )
+            await asyncio.sleep(1)
+        await operation
+
+    response = await wallet_manager.get_wallets_locks_hot(params={"limit": 1000})
+
+    assert response.status_code == 200
+    hottest = response.json()
+    waits = [entry["wait_total"] for entry in hottest]
+    assert waits == sorted(waits, reverse=True)
+
+    entry = next(e for e in hottest if e["wallet_id"] == str(wallet_uuid))
+    assert entry["wait_max"] >= 0.9
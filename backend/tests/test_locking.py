@@ -0,0 +1,225 @@
+import asyncio
+import uuid
+
+import pytest
+from database.exceptions import RecordLockedError, RecordNotFoundError
+from database.locking import LockStrategy, acquire_lock
+from database.models.wallet import Wallet
+from database.queries.wallet import (update_wallet_balance,
+                                     update_wallet_balance_locked,
+                                     update_wallet_balance_optimistic)
+from settings import settings
+from test_services.manager import WalletManager
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+@pytest.fixture
+async def wallet_uuid(wallet_manager):
+    """Новый кошелёк с балансом 10"""
+
+    response = await wallet_manager.post_wallets(json={})
+    wallet_id = response.json()["wallet_id"]
+    await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "DEPOSIT", "amount": 10}
+    )
+    return uuid.UUID(wallet_id)
+
+
+@pytest.mark.parametrize("strategy", list(LockStrategy))
+async def test_locked_update_with_strategy(session_factory, wallet_uuid, strategy):
+    """Изменение баланса под каждой стратегией блокировки"""
+
+    async with session_factory() as db:
+        wallet = await update_wallet_balance_locked(
+            db, wallet_uuid, "WITHDRAW", 3, strategy=strategy
+        )
+
+    assert wallet.balance == 7
+
+
+@pytest.mark.parametrize("strategy", [LockStrategy.NOWAIT, LockStrategy.SKIP_LOCKED])
+async def test_fail_fast_on_locked_record(session_factory, wallet_uuid, strategy):
+    """NOWAIT и SKIP LOCKED не ждут занятую строку"""
+
+    async with session_factory() as holder, session_factory() as db:
+        async with acquire_lock(holder, Wallet, wallet_uuid, "uuid"):
+            with pytest.raises(RecordLockedError):
+                async with acquire_lock(
+                    db, Wallet, wallet_uuid, "uuid", strategy=strategy
+                ):
+                    pass
+
+
+@pytest.mark.parametrize("strategy", list(LockStrategy))
+async def test_not_found_with_strategy(session_factory, strategy):
+    """Отсутствующая запись отличается от занятой"""
+
+    async with session_factory() as db:
+        with pytest.raises(RecordNotFoundError):
+            async with acquire_lock(
+                db, Wallet, uuid.uuid4(), "uuid", strategy=strategy
+            ):
+                pass
+
+
+async def test_advisory_lock_waits_for_holder(session_factory, wallet_uuid):
+    """Advisory-блокировка по одному ключу выстраивает транзакции в очередь"""
+
+    async with session_factory() as holder, session_factory() as db:
+        async with acquire_lock(
+            holder, Wallet, wallet_uuid, "uuid", strategy=LockStrategy.ADVISORY
+        ):
+            waiter = asyncio.create_task(
+                update_wallet_balance_locked(
+                    db, wallet_uuid, "DEPOSIT", 1, strategy=LockStrategy.ADVISORY
+                )
+            )
+            await asyncio.sleep(0.2)
+            assert not waiter.done()
+
+        wallet = await waiter
+
+    assert wallet.balance == 11
+
+
+async def test_advisory_lock_keeps_other_writers(session_factory, wallet_uuid):
+    """Изменение без advisory-блокировки не теряется под ADVISORY"""
+
+    async with session_factory() as holder, session_factory() as db:
+        async with acquire_lock(
+            holder, Wallet, wallet_uuid, "uuid", strategy=LockStrategy.ADVISORY
+        ) as wallet:
+            writer = asyncio.create_task(
+                update_wallet_balance(db, wallet_uuid, "DEPOSIT", 5)
+            )
+            await asyncio.sleep(0.2)
+            assert not writer.done()
+            wallet.balance += 1
+
+        await writer
+
+    async with session_factory() as db:
+        wallet = await update_wallet_balance_optimistic(db, wallet_uuid, "WITHDRAW", 0)
+
+    assert wallet.balance == 16
+
+
+async def test_optimistic_update_retries_on_conflict(session_factory, wallet_uuid):
+    """Одновременные оптимистичные изменения не теряют ни одной операции"""
+
+    async def deposit():
+        async with session_factory() as db:
+            return await update_wallet_balance_optimistic(
+                db, wallet_uuid, "DEPOSIT", 1, max_attempts=100
+            )
+
+    await asyncio.gather(*(deposit() for _ in range(20)))
+
+    async with session_factory() as db:
+        wallet = await update_wallet_balance_optimistic(db, wallet_uuid, "WITHDRAW", 0)
+
+    assert wallet.balance == 30
+
+
+async def test_operation_on_locked_wallet_returns_409(
+    wallet_manager, session_factory, wallet_uuid, monkeypatch
+):
+    """Стратегия NOWAIT из настроек: занятый кошелёк даёт 409"""
+
+    monkeypatch.setattr(settings, "wallet_batching", True)
+    monkeypatch.setattr(settings, "lock_strategy", "nowait")
+
+    async with session_factory() as holder:
+        async with acquire_lock(
+            holder, Wallet, wallet_uuid, "uuid", strategy=LockStrategy.FOR_UPDATE
+        ):
+            response = await wallet_manager.post_wallet_operation(
+                str(wallet_uuid), json={"operation_type": "DEPOSIT", "amount": 1}
+            )
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Кошелёк занят другой операцией"
+
+
+async def test_lock_timeout_raises_locked(session_factory, wallet_uuid):
+    """lock_timeout ограничивает ожидание FOR UPDATE"""
+
+    async with session_factory() as holder, session_factory() as db:
+        async with acquire_lock(holder, Wallet, wallet_uuid, "uuid"):
+            with pytest.raises(RecordLockedError):
+                async with acquire_lock(
+                    db,
+                    Wallet,
+                    wallet_uuid,
+                    "uuid",
+                    strategy=LockStrategy.FOR_UPDATE,
+                    lock_timeout_ms=100,
+                ):
+                    pass
+
+
+async def test_operation_lock_timeout_returns_409(
+    wallet_manager, session_factory, wallet_uuid, monkeypatch
+):
+    """Не дождавшись блокировки кошелька, операция отвечает 409 с Retry-After"""
+
+    monkeypatch.setattr(settings, "lock_timeout_ms", 100)
+    monkeypatch.setattr(settings, "retry_after", 2)
+
+    async with session_factory() as holder:
+        async with acquire_lock(holder, Wallet, wallet_uuid, "uuid"):
+            response = await wallet_manager.post_wallet_operation(
+                str(wallet_uuid), json={"operation_type": "DEPOSIT", "amount": 1}
+            )
+
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "2"
+
+    response = await wallet_manager.get_wallet(str(wallet_uuid))
+    assert response.json()["balance"] == 10
+
+
+async def test_operation_statement_timeout_returns_503(
+    wallet_manager, session_factory, wallet_uuid, monkeypatch
+):
+    """Операция дольше statement_timeout отвечает 503 с Retry-After"""
+
+    monkeypatch.setattr(settings, "statement_timeout_ms", 100)
+
+    async with session_factory() as holder:
+        async with acquire_lock(holder, Wallet, wallet_uuid, "uuid"):
+            response = await wallet_manager.post_wallet_operation(
+                str(wallet_uuid), json={"operation_type": "WITHDRAW", "amount": 1}
+            )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+async def test_batch_lock_timeout_returns_409(
+    wallet_manager, session_factory, wallet_uuid, monkeypatch
+):
+    """Пакет с занятым кошельком откатывается и отвечает 409"""
+
+    monkeypatch.setattr(settings, "lock_timeout_ms", 100)
+
+    async with session_factory() as holder:
+        async with acquire_lock(holder, Wallet, wallet_uuid, "uuid"):
+            response = await wallet_manager.post_wallets_operations_batch(
+                json={
+                    "operations": [
+                        {
+                            "wallet_id": str(wallet_uuid),
+                            "operation_type": "DEPOSIT",
+                            "amount": 1,
+                        }
+                    ]
+                }
+            )
+
+    assert response.status_code == 409
+    assert "Retry-After" in response.headers
@@ -0,0 +1,49 @@
+import uuid
+
+import pytest
+from metrics import http_request_duration_seconds, http_requests_total
+from test_services.manager import WalletManager
+
+WALLET_ROUTE = "/api/v1/wallets/{wallet_uuid}"
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+async def test_metrics_format(wallet_manager):
+    """Позитивная проверка: метрики отдаются в текстовом формате Prometheus"""
+
+    response = await wallet_manager.get_metrics()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert "# TYPE http_requests_in_progress gauge" in response.text
+    assert 'db_pool_connections{pool="write",state="checked_out"}' in response.text
+    assert 'db_pool_connections{pool="read",state="checked_out"}' in response.text
+
+
+async def test_requests_counted_by_route_template(wallet_manager):
+    """Запросы к разным кошелькам попадают в один ряд с шаблоном пути"""
+
+    before_ok = http_requests_total.value("GET", WALLET_ROUTE, 200)
+    before_not_found = http_requests_total.value("GET", WALLET_ROUTE, 404)
+    before_observed = http_request_duration_seconds.count("GET", WALLET_ROUTE)
+
+    response = await wallet_manager.post_wallets(json={})
+    await wallet_manager.get_wallet(response.json()["wallet_id"])
+    await wallet_manager.get_wallet(str(uuid.uuid4()))
+
+    assert http_requests_total.value("GET", WALLET_ROUTE, 200) == before_ok + 1
+    assert http_requests_total.value("GET", WALLET_ROUTE, 404) == before_not_found + 1
+    assert (
+        http_request_duration_seconds.count("GET", WALLET_ROUTE) == before_observed + 2
+    )
+
+    response = await wallet_manager.get_metrics()
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",'
+        f'route="{WALLET_ROUTE}",le="+Inf"}}' in response.text
+    )
@@ -0,0 +1,88 @@
+import asyncio
+import uuid
+
+import pytest
+from database.db import InstrumentedPool, ReadPool, engine, read_engine
+from database.models.wallet import Wallet
+from database.queries.wallet import add_wallets
+from metrics import db_pool_checkout_seconds
+from settings import Settings, settings
+from sqlalchemy import select
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from .conftest import DATABASE_URL
+
+
+@pytest.fixture
+async def pools():
+    write_engine = create_async_engine(
+        DATABASE_URL,
+        poolclass=InstrumentedPool,
+        pool_size=2,
+        max_overflow=0,
+        pool_timeout=0.2,
+    )
+    read_engine = create_async_engine(
+        DATABASE_URL, poolclass=ReadPool, pool_size=1, max_overflow=0, pool_timeout=0.2
+    )
+    yield write_engine, read_engine
+    await write_engine.dispose()
+    await read_engine.dispose()
+
+
+def test_app_pools():
+    """Пулы приложения: запись и чтение основной базы раздельно"""
+
+    assert engine.sync_engine.pool.pool_name == "write"
+    assert read_engine.sync_engine.pool.pool_name == "read"
+    assert read_engine.sync_engine.pool.size() == settings.worker_read_pool_size
+
+
+def test_read_pool_split_between_workers(monkeypatch):
+    """Пул чтения тоже делится между воркерами, 0 - без отдельного пула"""
+
+    monkeypatch.setenv("WORKERS", "4")
+    monkeypatch.setenv("DB_READ_POOL_SIZE", "8")
+    monkeypatch.setenv("DB_READ_MAX_OVERFLOW", "8")
+    assert Settings.from_env().worker_read_pool_size == 2
+    assert Settings.from_env().worker_read_max_overflow == 2
+
+    monkeypatch.setenv("DB_READ_POOL_SIZE", "0")
+    assert Settings.from_env().worker_read_pool_size == 0
+
+
+async def test_reads_not_starved_by_lock_waits(session_factory, pools):
+    """
+    Позитивная проверка: все соединения пула записи ждут блокировку
+    кошелька, а чтение через пул чтения проходит без ожидания
+    """
+    write_engine, read_engine = pools
+    wallet_uuid = uuid.uuid4()
+    async with session_factory() as session:
+        await add_wallets(session, [(wallet_uuid, 100)])
+    locked = select(Wallet.balance).where(Wallet.uuid == wallet_uuid).with_for_update()
+
+    async def wait_for_lock():
+        async with write_engine.begin() as connection:
+            await connection.execute(locked)
+
+    async with write_engine.begin() as holder:
+        await holder.execute(locked)
+        waiter = asyncio.create_task(wait_for_lock())
+        await asyncio.sleep(0.1)
+
+        with pytest.raises(PoolTimeoutError):
+            async with write_engine.connect():
+                pass
+
+        reads = db_pool_checkout_seconds.count("read")
+        async with read_engine.connect() as connection:
+            balance = await connection.scalar(
+                select(Wallet.balance).where(Wallet.uuid == wallet_uuid)
+            )
+
+        assert balance == 100
+        assert db_pool_checkout_seconds.count("read") == reads + 1
+
+    await waiter
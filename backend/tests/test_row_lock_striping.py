@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from database.locking import StripedLock, row_locks
+from settings import settings
+from test_services.manager import WalletManager
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+@pytest.fixture
+def striping(monkeypatch):
+    monkeypatch.setattr(settings, "row_lock_striping", True)
+    monkeypatch.setattr(row_locks, "max_waiting", 0)
+
+
+async def test_concurrent_operations_with_striping(wallet_manager, striping):
+    """Операции над горячим кошельком с блокировкой в процессе"""
+
+    create_response = await wallet_manager.post_wallets(json={})
+    wallet_id = create_response.json()["wallet_id"]
+
+    tasks = []
+    for _ in range(50):
+        tasks.append(
+            wallet_manager.post_wallet_operation(
+                wallet_id, json={"operation_type": "DEPOSIT", "amount": 2}
+            )
+        )
+        tasks.append(
+            wallet_manager.post_wallet_operation(
+                wallet_id, json={"operation_type": "WITHDRAW", "amount": 1}
+            )
+        )
+    responses = await asyncio.gather(*tasks)
+
+    expected_balance = 0
+    for response in responses:
+        if response.status_code == 200:
+            if response.json()["operation_type"] == "DEPOSIT":
+                expected_balance += 2
+            else:
+                expected_balance -= 1
+
+    final_response = await wallet_manager.get_wallet(wallet_id)
+    stats_response = await wallet_manager.get_wallets_locks_stats()
+    stats = stats_response.json()
+
+    assert final_response.json()["balance"] == expected_balance
+    assert stats["enabled"] is True
+    assert stats["waiting"] == 0
+    # 100 одновременных запросов к одному кошельку выстраиваются в очередь
+    assert stats["max_waiting"] >= 2
+
+
+async def test_striped_lock_queue_depth():
+    """Очередь на полосу видна в статистике"""
+
+    locks = StripedLock(stripes=4)
+    release = asyncio.Event()
+
+    async def worker():
+        async with locks.hold("key"):
+            await release.wait()
+
+    tasks = [asyncio.create_task(worker()) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    stats = locks.stats()
+    assert stats["waiting"] == 2
+    assert stats["busy"] == [
+        {"stripe": locks.stripe("key"), "waiting": 2, "held": True}
+    ]
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert locks.stats()["busy"] == []
+    assert locks.max_waiting == 2
+
+
+async def test_uncontended_lock_not_counted():
+    """Свободную полосу никто не ждёт"""
+
+    locks = StripedLock(stripes=4)
+
+    for _ in range(3):
+        async with locks.hold("key"):
+            pass
+
+    assert locks.max_waiting == 0
+
+
+async def test_queue_depth_in_metrics(wallet_manager, striping):
+    """Очередь на полосу видна в /metrics"""
+
+    release = asyncio.Event()
+
+    async def worker():
+        async with row_locks.hold("metrics-key"):
+            await release.wait()
+
+    tasks = [asyncio.create_task(worker()) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    response = await wallet_manager.get_metrics()
+    release.set()
+    await asyncio.gather(*tasks)
+
+    stripe = row_locks.stripe("metrics-key")
+    assert f'row_lock_waiting{{stripe="{stripe}"}} 2' in response.text
+    assert "row_lock_max_waiting 2" in response.text
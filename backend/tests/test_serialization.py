@@ -0,0 +1,108 @@
+import uuid
+
+import msgpack
+import pytest
+from api.v1.responses import JSON, MSGPACK, negotiate
+from test_services.manager import WalletManager
+
+ACCEPT_MSGPACK = {"Accept": MSGPACK}
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, JSON),
+        ("*/*", JSON),
+        ("application/json", JSON),
+        ("application/msgpack", MSGPACK),
+        ("application/x-msgpack", MSGPACK),
+        ("application/msgpack, application/json", MSGPACK),
+        ("application/json, application/msgpack;q=0.5", JSON),
+        ("application/json;q=0.5, application/msgpack", MSGPACK),
+        ("application/msgpack;q=0", JSON),
+    ],
+)
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
+
+
+async def test_get_wallet_msgpack(wallet_manager):
+    """Позитивная проверка: баланс кошелька в msgpack совпадает с JSON"""
+
+    response = await wallet_manager.post_wallets_bulk(json={"balances": [150]})
+    wallet_id = response.json()[0]["wallet_id"]
+
+    as_json = await wallet_manager.get_wallet(wallet_id)
+    as_msgpack = await wallet_manager.get_wallet(wallet_id, headers=ACCEPT_MSGPACK)
+
+    assert as_msgpack.status_code == 200
+    assert as_msgpack.headers["content-type"] == MSGPACK
+    assert as_msgpack.headers["vary"] == "Accept"
+    assert msgpack.unpackb(as_msgpack.content) == as_json.json()
+    assert as_json.json() == {"wallet_id": wallet_id, "balance": 150}
+
+
+async def test_wallet_list_msgpack(wallet_manager):
+    """Позитивная проверка: страница списка в msgpack с тем же курсором"""
+
+    await wallet_manager.post_wallets_bulk(json={"count": 3})
+    params = {"limit": 2}
+
+    as_json = await wallet_manager.get_wallets(params=params)
+    as_msgpack = await wallet_manager.get_wallets(params=params, headers=ACCEPT_MSGPACK)
+
+    assert as_msgpack.status_code == 200
+    assert msgpack.unpackb(as_msgpack.content) == as_json.json()
+    assert as_json.json()["next_cursor"] is not None
+
+
+async def test_bulk_create_msgpack(wallet_manager):
+    """Позитивная проверка: массовое создание отвечает 201 в msgpack"""
+
+    response = await wallet_manager.post_wallets_bulk(
+        json={"balances": [1, 2, 3]}, headers=ACCEPT_MSGPACK
+    )
+
+    assert response.status_code == 201
+    wallets = msgpack.unpackb(response.content)
+    assert [wallet["balance"] for wallet in wallets] == [1, 2, 3]
+    assert all(uuid.UUID(wallet["wallet_id"]) for wallet in wallets)
+
+
+async def test_operation_msgpack(wallet_manager):
+    """Позитивная проверка: ответ на операцию в msgpack"""
+
+    response = await wallet_manager.post_wallets_bulk(json={"balances": [100]})
+    wallet_id = response.json()[0]["wallet_id"]
+
+    response = await wallet_manager.post_wallet_operation(
+        wallet_id,
+        json={"operation_type": "WITHDRAW", "amount": 30},
+        headers=ACCEPT_MSGPACK,
+    )
+
+    assert response.status_code == 200
+    assert msgpack.unpackb(response.content) == {
+        "wallet_id": wallet_id,
+        "operation_type": "WITHDRAW",
+        "amount": 30,
+        "new_balance": 70,
+        "status": "success",
+    }
+
+
+async def test_errors_stay_json(wallet_manager):
+    """Негативная проверка: ошибки отдаются в JSON и при Accept msgpack"""
+
+    response = await wallet_manager.get_wallet(
+        str(uuid.uuid4()), headers=ACCEPT_MSGPACK
+    )
+
+    assert response.status_code == 404
+    assert response.headers["content-type"] == JSON
+    assert response.json() == {"detail": "Wallet not found"}
@@ -0,0 +1,41 @@
+from settings import Settings
+
+
+def test_pool_split_between_workers(monkeypatch):
+    """Общий пул соединений делится между воркерами"""
+
+    monkeypatch.setenv("WORKERS", "4")
+    monkeypatch.setenv("DB_POOL_SIZE", "24")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "40")
+
+    settings = Settings.from_env()
+
+    assert settings.worker_pool_size == 6
+    assert settings.worker_max_overflow == 10
+    assert settings.workers * (
+        settings.worker_pool_size + settings.worker_max_overflow
+    ) <= (settings.db_pool_size + settings.db_max_overflow)
+
+
+def test_pool_keeps_one_connection_per_worker(monkeypatch):
+    """Воркеров больше, чем соединений: у каждого остаётся одно"""
+
+    monkeypatch.setenv("WORKERS", "32")
+    monkeypatch.setenv("DB_POOL_SIZE", "8")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+
+    settings = Settings.from_env()
+
+    assert settings.worker_pool_size == 1
+    assert settings.worker_max_overflow == 0
+
+
+def test_balance_cache_off_with_workers(monkeypatch):
+    """Кэш балансов одного процесса не включается при нескольких воркерах"""
+
+    monkeypatch.setenv("BALANCE_CACHE", "1")
+    monkeypatch.setenv("WORKERS", "2")
+    assert not Settings.from_env().balance_cache
+
+    monkeypatch.setenv("WORKERS", "1")
+    assert Settings.from_env().balance_cache
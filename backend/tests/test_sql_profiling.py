@@ -0,0 +1,68 @@
+import logging
+import uuid
+
+import pytest
+from settings import settings
+from test_services.manager import WalletManager
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+def parse_server_timing(header: str) -> dict[str, str]:
+    metrics = {}
+    for entry in header.split(","):
+        name, *params = entry.strip().split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+async def test_server_timing_disabled(wallet_manager):
+    """Без SQL_PROFILING заголовка нет"""
+
+    response = await wallet_manager.post_wallets(json={})
+
+    assert response.status_code == 201
+    assert "server-timing" not in response.headers
+
+
+async def test_create_wallet_round_trips(wallet_manager, monkeypatch):
+    """Позитивная проверка: создание кошелька - один INSERT и один COMMIT"""
+
+    monkeypatch.setattr(settings, "sql_profiling", True)
+
+    response = await wallet_manager.post_wallets(json={})
+
+    timing = parse_server_timing(response.headers["server-timing"])
+    assert timing["db-statements"]["desc"] == '"1"'
+    assert timing["db-commits"]["desc"] == '"1"'
+    assert float(timing["db"]["dur"]) > 0
+
+
+async def test_get_wallet_round_trips(wallet_manager, monkeypatch):
+    """Позитивная проверка: чтение кошелька - один SELECT без COMMIT"""
+
+    monkeypatch.setattr(settings, "sql_profiling", True)
+
+    response = await wallet_manager.get_wallet(str(uuid.uuid4()))
+
+    assert response.status_code == 404
+    timing = parse_server_timing(response.headers["server-timing"])
+    assert timing["db-statements"]["desc"] == '"1"'
+    assert timing["db-commits"]["desc"] == '"0"'
+
+
+async def test_statements_logged(wallet_manager, monkeypatch, caplog):
+    """С SQL_PROFILING_LOG запросы пишутся в лог"""
+
+    monkeypatch.setattr(settings, "sql_profiling", True)
+    monkeypatch.setattr(settings, "sql_profiling_log", True)
+
+    with caplog.at_level(logging.INFO, logger="database.profiling"):
+        await wallet_manager.post_wallets(json={})
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("1 statements, 1 commits" in message for message in messages)
+    assert any("INSERT INTO wallets" in message for message in messages)
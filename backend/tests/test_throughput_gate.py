@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from .utils.throughput import ThroughputGate
+
+BASELINE = {"deposits_10x10": {"ops_per_sec": 100.0, "p99_ms": 50.0, "requests": 100}}
+
+
+def test_within_tolerance():
+    gate = ThroughputGate(BASELINE, tolerance=0.4, latency_tolerance=1.0)
+
+    # 100 запросов за 1.5 с: 66.7 ops/sec, p99 90 мс
+    regressions = gate.check("deposits_10x10", [0.09] * 100, 1.5)
+
+    assert regressions == []
+    assert gate.results["deposits_10x10"]["ops_per_sec"] == 66.7
+
+
+def test_regression_detected():
+    gate = ThroughputGate(BASELINE, tolerance=0.4, latency_tolerance=1.0)
+
+    # Пропускная способность упала вдвое, p99 вырос в три раза
+    regressions = gate.check("deposits_10x10", [0.15] * 100, 2.0)
+
+    assert len(regressions) == 2
+
+
+def test_scenario_without_baseline_only_recorded():
+    gate = ThroughputGate(BASELINE, tolerance=0.4, latency_tolerance=1.0)
+
+    with pytest.warns(UserWarning, match="нет базовой линии"):
+        assert gate.check("mixed_10x100", [10.0] * 10, 100.0) == []
+    assert "mixed_10x100" in gate.results
+
+
+def test_baseline_by_profile(tmp_path):
+    path = tmp_path / "baseline.json"
+    slow = {"deposits_10x10": {"ops_per_sec": 10.0, "p99_ms": 500.0, "requests": 100}}
+    path.write_text(json.dumps({"laptop": BASELINE, "default": slow}))
+
+    # Без своего профиля сравнение идёт с default
+    gate = ThroughputGate.from_file(path, None, 0.4, 1.0)
+    assert gate.check("deposits_10x10", [0.15] * 100, 2.0) == []
+    assert len(gate.check("deposits_10x10", [1.5] * 100, 20.0)) == 2
+
+    gate = ThroughputGate.from_file(path, "laptop", 0.4, 1.0)
+    assert len(gate.check("deposits_10x10", [0.15] * 100, 2.0)) == 2
+
+    # Профиль без базовой линии только записывает
+    gate = ThroughputGate.from_file(path, "ci", 0.4, 1.0)
+    with pytest.warns(UserWarning):
+        assert gate.check("deposits_10x10", [1.5] * 100, 20.0) == []
+
+    gate.update_baseline(path, "ci")
+    assert set(json.loads(path.read_text())) == {"laptop", "default", "ci"}
@@ -0,0 +1,108 @@
+import pytest
+from database.models.wallet import Wallet
+from database.models.wallet_stats import WalletStatsDelta
+from database.queries.wallet_stats import fold_wallet_stats
+from sqlalchemy import func, select
+from test_services.manager import WalletManager
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+async def scan_wallets(session_factory) -> dict:
+    """Та же сводка полным обходом wallets"""
+
+    bucket = func.wallet_balance_bucket(Wallet.balance)
+    async with session_factory() as session:
+        result = await session.execute(
+            select(bucket, func.count(), func.sum(Wallet.balance))
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+        rows = result.all()
+
+    return {
+        "wallets": sum(row[1] for row in rows),
+        "total": sum(int(row[2]) for row in rows),
+        "buckets": {row[0]: (row[1], int(row[2])) for row in rows},
+    }
+
+
+def by_bucket(aggregates: dict) -> dict:
+    """Корзины ответа по числу цифр баланса, как в wallet_balance_bucket"""
+
+    buckets = {}
+    for bucket in aggregates["buckets"]:
+        digits = len(str(bucket["min_balance"])) if bucket["min_balance"] else 0
+        buckets[digits] = (bucket["wallets"], bucket["total"])
+    return buckets
+
+
+async def test_aggregates_follow_writes(wallet_manager, session_factory):
+    """Позитивная проверка: сводка совпадает с полным обходом после любых изменений"""
+
+    response = await wallet_manager.post_wallets_bulk(
+        json={"balances": [0, 5, 99, 100, 9_223_372_036_854_775_807]}
+    )
+    wallet_ids = [wallet["wallet_id"] for wallet in response.json()]
+    await wallet_manager.post_wallets(json={})
+    await wallet_manager.post_wallet_operation(
+        wallet_ids[1], json={"operation_type": "DEPOSIT", "amount": 95}
+    )
+    await wallet_manager.post_wallet_operation(
+        wallet_ids[3], json={"operation_type": "WITHDRAW", "amount": 100}
+    )
+    await wallet_manager.post_wallets_operations_batch(
+        json={
+            "operations": [
+                {"wallet_id": wallet_ids[2], "operation_type": "DEPOSIT", "amount": 1},
+                {"wallet_id": wallet_ids[0], "operation_type": "DEPOSIT", "amount": 7},
+            ]
+        }
+    )
+
+    response = await wallet_manager.get_wallets_aggregates()
+
+    assert response.status_code == 200
+    aggregates = response.json()
+    expected = await scan_wallets(session_factory)
+    assert aggregates["wallets"] == expected["wallets"]
+    assert aggregates["total"] == expected["total"]
+    assert by_bucket(aggregates) == expected["buckets"]
+    # Сумма уже не помещается в bigint
+    assert aggregates["total"] > 9_223_372_036_854_775_807
+
+
+async def test_failed_operation_changes_nothing(wallet_manager, session_factory):
+    """Негативная проверка: отклонённое списание не попадает в сводку"""
+
+    response = await wallet_manager.post_wallets_bulk(json={"balances": [10]})
+    wallet_id = response.json()[0]["wallet_id"]
+    before = (await wallet_manager.get_wallets_aggregates()).json()
+
+    response = await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "WITHDRAW", "amount": 11}
+    )
+
+    assert response.status_code == 400
+    assert (await wallet_manager.get_wallets_aggregates()).json() == before
+
+
+async def test_fold_keeps_aggregates(wallet_manager, session_factory):
+    """Позитивная проверка: свёртка изменений не меняет сводку"""
+
+    await wallet_manager.post_wallets_bulk(json={"count": 3})
+    before = (await wallet_manager.get_wallets_aggregates()).json()
+
+    async with session_factory() as session:
+        assert await fold_wallet_stats(session) > 0
+        assert await fold_wallet_stats(session) == 0
+        pending = await session.scalar(
+            select(func.count()).select_from(WalletStatsDelta)
+        )
+
+    assert pending == 0
+    assert (await wallet_manager.get_wallets_aggregates()).json() == before
+    assert before["wallets"] == (await scan_wallets(session_factory))["wallets"]
@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+
+import pytest
+from test_services.manager import WalletManager
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+@pytest.fixture
+async def wallet_id(wallet_manager):
+    """Кошелёк с ненулевым балансом, который должен попасть в выгрузку"""
+
+    response = await wallet_manager.post_wallets(json={})
+    created_wallet_id = response.json()["wallet_id"]
+    await wallet_manager.post_wallet_operation(
+        created_wallet_id, json={"operation_type": "DEPOSIT", "amount": 42}
+    )
+    return created_wallet_id
+
+
+async def test_export_ndjson(wallet_manager, wallet_id):
+    """Позитивная проверка: выгрузка в NDJSON"""
+
+    response = await wallet_manager.get_wallets_export()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    balances = {row["wallet_id"]: row["balance"] for row in rows}
+
+    assert balances[wallet_id] == 42
+
+
+async def test_export_csv(wallet_manager, wallet_id):
+    """Позитивная проверка: выгрузка в CSV"""
+
+    response = await wallet_manager.get_wallets_export(params={"format": "csv"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    balances = {row["wallet_id"]: int(row["balance"]) for row in rows}
+
+    assert balances[wallet_id] == 42
+
+
+async def test_export_ordered_without_duplicates(wallet_manager, wallet_id):
+    """Выгрузка упорядочена по идентификатору и не содержит повторов"""
+
+    response = await wallet_manager.get_wallets_export()
+
+    exported_ids = [
+        json.loads(line)["wallet_id"] for line in response.text.splitlines()
+    ]
+
+    assert exported_ids == sorted(set(exported_ids))
+
+
+async def test_export_unknown_format(wallet_manager):
+    """Негативная проверка: неизвестный формат выгрузки"""
+
+    response = await wallet_manager.get_wallets_export(params={"format": "xml"})
+
+    assert response.status_code == 422
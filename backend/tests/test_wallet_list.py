@@ -1,3 +1,5 @@
+import random
+
 import pytest
 from test_services.manager import WalletManager
 from tests.utils.assertions import assert_wallet
@@ -15,7 +17,74 @@ async def test_list_wallets(wallet_manager):
     response_json = response.json()
 
     assert response.status_code == 200
-    assert isinstance(response_json, list)
+    assert isinstance(response_json, dict)
+    assert isinstance(response_json["items"], list)
 
-    for wallet in response_json:
+    for wallet in response_json["items"]:
         assert_wallet(wallet)
+
+
+async def test_list_wallets_pagination(wallet_manager):
+    """Позитивная проверка: обход списка страницами по курсору"""
+
+    balance = random.randint(10**9, 10**12)
+    created = []
+    for _ in range(5):
+        create_response = await wallet_manager.post_wallets(json={})
+        wallet_id = create_response.json()["wallet_id"]
+        await wallet_manager.post_wallet_operation(
+            wallet_id, json={"operation_type": "DEPOSIT", "amount": balance}
+        )
+        created.append(wallet_id)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "min_balance": balance, "max_balance": balance}
+        if cursor is not None:
+            params["cursor"] = cursor
+
+        response = await wallet_manager.get_wallets(params=params)
+        response_json = response.json()
+
+        assert response.status_code == 200
+        assert len(response_json["items"]) <= 2
+        seen.extend(w["wallet_id"] for w in response_json["items"])
+
+        cursor = response_json["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == sorted(created)
+
+
+async def test_list_wallets_balance_filter(wallet_manager):
+    """Позитивная проверка: фильтр по балансу"""
+
+    create_response = await wallet_manager.post_wallets(json={})
+    wallet_id = create_response.json()["wallet_id"]
+    await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "DEPOSIT", "amount": 777_777}
+    )
+
+    response = await wallet_manager.get_wallets(
+        params={"min_balance": 777_777, "max_balance": 777_777, "limit": 1000}
+    )
+    items = response.json()["items"]
+
+    assert response.status_code == 200
+    assert wallet_id in [w["wallet_id"] for w in items]
+    assert all(w["balance"] == 777_777 for w in items)
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{"limit": 0}, {"limit": 1001}, {"cursor": "%%%"}, {"cursor": "WzFd"}],
+    ids=["zero_limit", "too_big_limit", "broken_cursor", "wrong_cursor_type"],
+)
+async def test_list_wallets_invalid_params(wallet_manager, params):
+    """Негативная проверка: некорректные параметры пагинации"""
+
+    response = await wallet_manager.get_wallets(params=params)
+
+    assert response.status_code in (400, 422)
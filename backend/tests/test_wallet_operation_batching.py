@@ -0,0 +1,149 @@
+import asyncio
+import uuid
+
+import pytest
+from database.batching import WalletOperationBatcher, wallet_batcher
+from database.queries.operation import record_operations
+from settings import settings
+from test_services.manager import WalletManager
+from tests.utils.assertions import assert_detail_is_insufficient_funds
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+@pytest.fixture
+def batching(monkeypatch):
+    monkeypatch.setattr(settings, "wallet_batching", True)
+    monkeypatch.setattr(wallet_batcher, "flushes", 0)
+
+
+async def test_batched_withdrawals_get_own_results(wallet_manager, batching):
+    """Пачка списаний: каждая операция получает свой результат"""
+
+    create_response = await wallet_manager.post_wallets(json={})
+    wallet_id = create_response.json()["wallet_id"]
+
+    await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "DEPOSIT", "amount": 10}
+    )
+
+    responses = await asyncio.gather(
+        *[
+            wallet_manager.post_wallet_operation(
+                wallet_id, json={"operation_type": "WITHDRAW", "amount": 1}
+            )
+            for _ in range(15)
+        ]
+    )
+
+    successful = [r for r in responses if r.status_code == 200]
+    failed = [r for r in responses if r.status_code == 400]
+
+    assert len(successful) == 10
+    assert len(failed) == 5
+    for response in failed:
+        assert_detail_is_insufficient_funds(response.json())
+
+    new_balances = sorted(r.json()["new_balance"] for r in successful)
+    assert new_balances == list(range(10))
+
+    final_response = await wallet_manager.get_wallet(wallet_id)
+    assert final_response.json()["balance"] == 0
+    # Пополнение и 15 списаний прошли меньшим числом транзакций
+    assert 0 < wallet_batcher.flushes < 16
+
+
+async def test_batched_mixed_operations(wallet_manager, batching):
+    """Пачка пополнений и списаний вперемешку сходится по балансу"""
+
+    create_response = await wallet_manager.post_wallets(json={})
+    wallet_id = create_response.json()["wallet_id"]
+
+    tasks = []
+    for _ in range(50):
+        tasks.append(
+            wallet_manager.post_wallet_operation(
+                wallet_id, json={"operation_type": "DEPOSIT", "amount": 2}
+            )
+        )
+        tasks.append(
+            wallet_manager.post_wallet_operation(
+                wallet_id, json={"operation_type": "WITHDRAW", "amount": 1}
+            )
+        )
+    responses = await asyncio.gather(*tasks)
+
+    balance = 0
+    for response in responses:
+        if response.status_code == 200:
+            response_json = response.json()
+            if response_json["operation_type"] == "DEPOSIT":
+                balance += 2
+            else:
+                balance -= 1
+
+    final_response = await wallet_manager.get_wallet(wallet_id)
+    assert final_response.json()["balance"] == balance
+    assert 0 < wallet_batcher.flushes < len(tasks)
+
+
+async def create_wallet(wallet_manager, balance: int) -> uuid.UUID:
+    response = await wallet_manager.post_wallets_bulk(json={"balances": [balance]})
+    return uuid.UUID(response.json()[0]["wallet_id"])
+
+
+async def test_cancelled_follower_during_window(wallet_manager, session_factory):
+    """Отменённый до commit запрос не применяется, остальные получают результат"""
+
+    wallet_uuid = await create_wallet(wallet_manager, 10)
+    batcher = WalletOperationBatcher(window=0.2, max_size=100)
+
+    async with session_factory() as db:
+        leader = asyncio.create_task(batcher.submit(db, wallet_uuid, "DEPOSIT", 1))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(batcher.submit(db, wallet_uuid, "DEPOSIT", 2))
+        survivor = asyncio.create_task(batcher.submit(db, wallet_uuid, "DEPOSIT", 4))
+        await asyncio.sleep(0.05)
+        follower.cancel()
+
+        leader_wallet, survivor_wallet = await asyncio.gather(leader, survivor)
+
+    assert follower.cancelled()
+    assert (leader_wallet.balance, survivor_wallet.balance) == (11, 15)
+    response = await wallet_manager.get_wallet(str(wallet_uuid))
+    assert response.json()["balance"] == 15
+
+
+async def test_cancelled_during_commit(wallet_manager, session_factory, monkeypatch):
+    """Отмена ведомого и лидера во время commit не ломает ответы остальным"""
+
+    wallet_uuid = await create_wallet(wallet_manager, 10)
+    batcher = WalletOperationBatcher(window=0.05, max_size=100)
+    cancelled = []
+
+    async def cancel_then_record(db, operations):
+        for task in cancelled:
+            task.cancel()
+        await asyncio.sleep(0)
+        await record_operations(db, operations)
+
+    monkeypatch.setattr("database.batching.record_operations", cancel_then_record)
+
+    async with session_factory() as db:
+        leader = asyncio.create_task(batcher.submit(db, wallet_uuid, "DEPOSIT", 1))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(batcher.submit(db, wallet_uuid, "DEPOSIT", 2))
+        survivor = asyncio.create_task(batcher.submit(db, wallet_uuid, "DEPOSIT", 4))
+        cancelled.extend([leader, follower])
+
+        survivor_wallet = await survivor
+        results = await asyncio.gather(leader, follower, return_exceptions=True)
+
+    # Операции уже были применены и закоммичены вместе с пачкой
+    assert all(isinstance(r, asyncio.CancelledError) for r in results)
+    assert survivor_wallet.balance == 17
+    response = await wallet_manager.get_wallet(str(wallet_uuid))
+    assert response.json()["balance"] == 17
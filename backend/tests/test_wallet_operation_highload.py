@@ -1,5 +1,6 @@
 import asyncio
 import sys
+import time
 from typing import Callable, Optional
 
 import pytest
@@ -12,12 +13,22 @@ async def wallet_manager(client):
     return WalletManager(client)
 
 
+async def timed(original_task, latencies: list):
+    """Выполняет запрос и записывает время ответа"""
+    start = time.perf_counter()
+    try:
+        return await original_task
+    finally:
+        latencies.append(time.perf_counter() - start)
+
+
 async def concurrent_operations(
     wallet_manager,
     wallet_id,
     operation_type,
     count=10,
     progress_callback: Optional[Callable] = None,
+    latencies: Optional[list] = None,
 ):
     """Выполняет операции с возможностью отслеживания прогресса"""
     tasks = []
@@ -25,6 +36,8 @@ async def concurrent_operations(
         task = wallet_manager.post_wallet_operation(
             wallet_id, json={"operation_type": operation_type, "amount": 1.0}
         )
+        if latencies is not None:
+            task = timed(task, latencies)
 
         # Оборачиваем задачу для отслеживания завершения
         if progress_callback:
@@ -45,7 +58,11 @@ async def concurrent_operations(
 
 
 async def concurrent_mixed_operations(
-    wallet_manager, wallet_id, batch_size, progress_callback: Optional[Callable] = None
+    wallet_manager,
+    wallet_id,
+    batch_size,
+    progress_callback: Optional[Callable] = None,
+    latencies: Optional[list] = None,
 ):
     """Выполняет смешанные операции с возможностью отслеживания прогресса"""
     tasks = []
@@ -57,6 +74,9 @@ async def concurrent_mixed_operations(
         deposit_task = wallet_manager.post_wallet_operation(
             wallet_id, json={"operation_type": "DEPOSIT", "amount": 1.0}
         )
+        if latencies is not None:
+            withdraw_task = timed(withdraw_task, latencies)
+            deposit_task = timed(deposit_task, latencies)
 
         if progress_callback:
 
@@ -94,7 +114,7 @@ async def concurrent_mixed_operations(
     ],
 )
 async def test_concurrent_deposits_batches(
-    wallet_manager, batch_count, requests_per_batch
+    wallet_manager, throughput_gate, batch_count, requests_per_batch
 ):
     """Тест параллельных пополнений батчами"""
     test_name = f"deposits_{batch_count}x{requests_per_batch}"
@@ -114,6 +134,7 @@ async def test_concurrent_deposits_batches(
     assert initial_balance == initial_deposit
 
     all_results = []
+    latencies = []
     total_requests = batch_count * requests_per_batch
 
     with tqdm(
@@ -129,6 +150,8 @@ async def test_concurrent_deposits_batches(
         def update_progress():
             pbar.update(1)
 
+        started = time.perf_counter()
+
         for batch_num in range(batch_count):
             results = await concurrent_operations(
                 wallet_manager,
@@ -136,9 +159,12 @@ async def test_concurrent_deposits_batches(
                 "DEPOSIT",
                 count=requests_per_batch,
                 progress_callback=update_progress,
+                latencies=latencies,
             )
             all_results.extend(results)
 
+        elapsed = time.perf_counter() - started
+
     successful_deposits = 0
 
     for response in all_results:
@@ -157,6 +183,7 @@ async def test_concurrent_deposits_batches(
     )
 
     assert actual_balance == expected_balance
+    assert throughput_gate.check(test_name, latencies, elapsed) == []
 
 
 @pytest.mark.highload
@@ -168,7 +195,7 @@ async def test_concurrent_deposits_batches(
     ],
 )
 async def test_concurrent_withdrawals_batches(
-    wallet_manager, batch_count, requests_per_batch
+    wallet_manager, throughput_gate, batch_count, requests_per_batch
 ):
     """Тест параллельных списаний батчами"""
     test_name = f"withdrawals_{batch_count}x{requests_per_batch}"
@@ -188,6 +215,7 @@ async def test_concurrent_withdrawals_batches(
     assert initial_balance == initial_deposit
 
     all_results = []
+    latencies = []
     total_requests = batch_count * requests_per_batch
 
     with tqdm(
@@ -203,6 +231,8 @@ async def test_concurrent_withdrawals_batches(
         def update_progress():
             pbar.update(1)
 
+        started = time.perf_counter()
+
         for batch_num in range(batch_count):
             results = await concurrent_operations(
                 wallet_manager,
@@ -210,9 +240,12 @@ async def test_concurrent_withdrawals_batches(
                 "WITHDRAW",
                 count=requests_per_batch,
                 progress_callback=update_progress,
+                latencies=latencies,
             )
             all_results.extend(results)
 
+        elapsed = time.perf_counter() - started
+
     successful_withdrawals = 0
     failed_withdrawals = 0
 
@@ -234,6 +267,7 @@ async def test_concurrent_withdrawals_batches(
     )
 
     assert actual_balance == expected_balance
+    assert throughput_gate.check(test_name, latencies, elapsed) == []
 
 
 @pytest.mark.highload
@@ -245,7 +279,7 @@ async def test_concurrent_withdrawals_batches(
     ],
 )
 async def test_concurrent_mixed_operations_batches(
-    wallet_manager, batch_count, batch_size
+    wallet_manager, throughput_gate, batch_count, batch_size
 ):
     """Тест параллельных смешанных операций батчами"""
     test_name = f"mixed_{batch_count}x{batch_size}"
@@ -265,6 +299,7 @@ async def test_concurrent_mixed_operations_batches(
     assert initial_balance == initial_deposit
 
     all_results = []
+    latencies = []
     total_requests = batch_count * batch_size * 2  # Каждый батч содержит 2 операции
 
     with tqdm(
@@ -280,12 +315,20 @@ async def test_concurrent_mixed_operations_batches(
         def update_progress():
             pbar.update(1)
 
+        started = time.perf_counter()
+
         for batch_num in range(batch_count):
             results = await concurrent_mixed_operations(
-                wallet_manager, wallet_id, batch_size, progress_callback=update_progress
+                wallet_manager,
+                wallet_id,
+                batch_size,
+                progress_callback=update_progress,
+                latencies=latencies,
             )
             all_results.extend(results)
 
+        elapsed = time.perf_counter() - started
+
     successful_withdrawals = 0
     failed_withdrawals = 0
     successful_deposits = 0
@@ -315,3 +358,4 @@ async def test_concurrent_mixed_operations_batches(
     )
 
     assert actual_balance == expected_balance
+    assert throughput_gate.check(test_name, latencies, elapsed) == []
@@ -0,0 +1,130 @@
+import asyncio
+import uuid
+
+import pytest
+from settings import settings
+from test_services.manager import WalletManager
+from tests.utils.assertions import assert_operation_success
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+@pytest.fixture
+async def wallet_id(wallet_manager):
+    """Кошелёк с балансом 100"""
+
+    response = await wallet_manager.post_wallets(json={})
+    created_wallet_id = response.json()["wallet_id"]
+    await wallet_manager.post_wallet_operation(
+        created_wallet_id, json={"operation_type": "DEPOSIT", "amount": 100}
+    )
+    return created_wallet_id
+
+
+def _key_header() -> dict[str, str]:
+    return {"Idempotency-Key": str(uuid.uuid4())}
+
+
+async def _balance(wallet_manager, wallet_id) -> int:
+    response = await wallet_manager.get_wallet(wallet_id)
+    return response.json()["balance"]
+
+
+async def test_idempotent_retry_returns_stored_response(wallet_manager, wallet_id):
+    """Повтор с тем же ключом отдаёт сохранённый ответ и не меняет баланс"""
+
+    headers = _key_header()
+    payload = {"operation_type": "WITHDRAW", "amount": 10}
+
+    first = await wallet_manager.post_wallet_operation(
+        wallet_id, json=payload, headers=headers
+    )
+    second = await wallet_manager.post_wallet_operation(
+        wallet_id, json=payload, headers=headers
+    )
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert_operation_success(
+        second.json(), wallet_id=wallet_id, operation_type="WITHDRAW", amount=10
+    )
+    assert second.json() == first.json()
+    assert second.headers.get("Idempotent-Replayed") == "true"
+    assert await _balance(wallet_manager, wallet_id) == 90
+
+
+async def test_idempotent_concurrent_retries(wallet_manager, wallet_id):
+    """Одновременные запросы с одним ключом списывают один раз"""
+
+    headers = _key_header()
+    payload = {"operation_type": "WITHDRAW", "amount": 1}
+
+    responses = await asyncio.gather(
+        *[
+            wallet_manager.post_wallet_operation(
+                wallet_id, json=payload, headers=headers
+            )
+            for _ in range(10)
+        ]
+    )
+
+    assert all(r.status_code == 200 for r in responses)
+    assert {r.json()["new_balance"] for r in responses} == {99}
+    assert await _balance(wallet_manager, wallet_id) == 99
+
+
+async def test_idempotency_key_reused_for_other_request(wallet_manager, wallet_id):
+    """Негативная проверка: ключ от другого запроса"""
+
+    headers = _key_header()
+
+    await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "DEPOSIT", "amount": 1}, headers=headers
+    )
+    response = await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "DEPOSIT", "amount": 2}, headers=headers
+    )
+
+    assert response.status_code == 422
+    assert await _balance(wallet_manager, wallet_id) == 101
+
+
+async def test_failed_operation_key_not_stored(wallet_manager, wallet_id):
+    """Неудачная операция не занимает ключ"""
+
+    headers = _key_header()
+    payload = {"operation_type": "WITHDRAW", "amount": 150}
+
+    failed = await wallet_manager.post_wallet_operation(
+        wallet_id, json=payload, headers=headers
+    )
+    await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "DEPOSIT", "amount": 50}
+    )
+    retried = await wallet_manager.post_wallet_operation(
+        wallet_id, json=payload, headers=headers
+    )
+
+    assert failed.status_code == 400
+    assert retried.status_code == 200
+    assert retried.json()["new_balance"] == 0
+
+
+async def test_expired_key_is_reused(wallet_manager, wallet_id, monkeypatch):
+    """Просроченный ключ больше не защищает от повтора"""
+
+    monkeypatch.setattr(settings, "idempotency_ttl", 0)
+    headers = _key_header()
+    payload = {"operation_type": "WITHDRAW", "amount": 1}
+
+    for _ in range(2):
+        response = await wallet_manager.post_wallet_operation(
+            wallet_id, json=payload, headers=headers
+        )
+        assert response.status_code == 200
+        assert "Idempotent-Replayed" not in response.headers
+
+    assert await _balance(wallet_manager, wallet_id) == 98
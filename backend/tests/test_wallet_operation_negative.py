@@ -1,3 +1,5 @@
+import uuid
+
 import pytest
 from test_services.manager import WalletManager
 from tests.utils.assertions import (assert_detail_is_amount_gt_0_validation,
@@ -219,3 +221,40 @@ async def test_wallet_operation_amount_bigint_plus_one(wallet_manager, wallet_id
     assert first['msg'] == 'Input should be less than or equal to 9223372036854775807'
     assert first['input'] == exceeding_amount
     assert first['ctx']['le'] == 9223372036854775807
+
+
+async def test_wallet_operation_deposit_overflow(wallet_manager, wallet_id):
+    """Негативная проверка: пополнение сверх BIGINT не меняет баланс"""
+
+    max_bigint = 2**63 - 1
+    await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "DEPOSIT", "amount": max_bigint}
+    )
+
+    response = await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "DEPOSIT", "amount": 1}
+    )
+    balance_response = await wallet_manager.get_wallet(wallet_id)
+
+    assert response.status_code == 400
+    assert (
+        response.json().get("detail")
+        == "Баланс превышает максимально допустимое значение"
+    )
+    assert balance_response.json()["balance"] == max_bigint
+
+
+async def test_wallet_operation_wallet_not_found(wallet_manager):
+    """Негативная проверка: операция над несуществующим кошельком"""
+
+    not_existing_wallet_id = str(uuid.uuid4())
+
+    response = await wallet_manager.post_wallet_operation(
+        not_existing_wallet_id, json={"operation_type": "DEPOSIT", "amount": 1}
+    )
+
+    assert response.status_code == 400
+    assert (
+        response.json().get("detail")
+        == f"Record not found: {not_existing_wallet_id}"
+    )
@@ -0,0 +1,140 @@
+import asyncio
+import uuid
+
+import pytest
+from test_services.manager import WalletManager
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+@pytest.fixture
+async def wallet_ids(wallet_manager):
+    """Три новых кошелька с балансом 10"""
+
+    created = []
+    for _ in range(3):
+        response = await wallet_manager.post_wallets(json={})
+        wallet_id = response.json()["wallet_id"]
+        await wallet_manager.post_wallet_operation(
+            wallet_id, json={"operation_type": "DEPOSIT", "amount": 10}
+        )
+        created.append(wallet_id)
+    return created
+
+
+async def _balance(wallet_manager, wallet_id) -> int:
+    response = await wallet_manager.get_wallet(wallet_id)
+    return response.json()["balance"]
+
+
+async def test_batch_atomic_success(wallet_manager, wallet_ids):
+    """Позитивная проверка: пакет применяется по порядку"""
+
+    first, second, third = wallet_ids
+    payload = {
+        "operations": [
+            {"wallet_id": first, "operation_type": "WITHDRAW", "amount": 10},
+            {"wallet_id": second, "operation_type": "DEPOSIT", "amount": 10},
+            {"wallet_id": first, "operation_type": "DEPOSIT", "amount": 3},
+            {"wallet_id": third, "operation_type": "WITHDRAW", "amount": 1},
+        ]
+    }
+
+    response = await wallet_manager.post_wallets_operations_batch(json=payload)
+    results = response.json()["results"]
+
+    assert response.status_code == 200
+    assert [r["status"] for r in results] == ["success"] * 4
+    assert [r["new_balance"] for r in results] == [0, 20, 3, 9]
+    assert await _balance(wallet_manager, first) == 3
+    assert await _balance(wallet_manager, second) == 20
+    assert await _balance(wallet_manager, third) == 9
+
+
+async def test_batch_atomic_rollback(wallet_manager, wallet_ids):
+    """Негативная проверка: ошибка одной операции откатывает весь пакет"""
+
+    first, second, _ = wallet_ids
+    payload = {
+        "mode": "ATOMIC",
+        "operations": [
+            {"wallet_id": first, "operation_type": "DEPOSIT", "amount": 5},
+            {"wallet_id": second, "operation_type": "WITHDRAW", "amount": 11},
+        ],
+    }
+
+    response = await wallet_manager.post_wallets_operations_batch(json=payload)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Операция #1: Недостаточно средств"
+    assert await _balance(wallet_manager, first) == 10
+    assert await _balance(wallet_manager, second) == 10
+
+
+async def test_batch_partial(wallet_manager, wallet_ids):
+    """Позитивная проверка: в режиме PARTIAL ошибки не мешают остальным"""
+
+    first, second, _ = wallet_ids
+    missing = str(uuid.uuid4())
+    payload = {
+        "mode": "PARTIAL",
+        "operations": [
+            {"wallet_id": first, "operation_type": "WITHDRAW", "amount": 11},
+            {"wallet_id": missing, "operation_type": "DEPOSIT", "amount": 1},
+            {"wallet_id": second, "operation_type": "WITHDRAW", "amount": 4},
+        ],
+    }
+
+    response = await wallet_manager.post_wallets_operations_batch(json=payload)
+    results = response.json()["results"]
+
+    assert response.status_code == 200
+    assert [r["status"] for r in results] == ["error", "error", "success"]
+    assert results[0]["detail"] == "Недостаточно средств"
+    assert results[1]["detail"] == f"Record not found: {missing}"
+    assert results[2]["new_balance"] == 6
+    assert await _balance(wallet_manager, first) == 10
+    assert await _balance(wallet_manager, second) == 6
+
+
+async def test_batch_opposite_order_no_deadlock(wallet_manager, wallet_ids):
+    """Встречные пакеты по одним и тем же кошелькам не блокируют друг друга"""
+
+    first, second, _ = wallet_ids
+    forward = {
+        "operations": [
+            {"wallet_id": first, "operation_type": "DEPOSIT", "amount": 1},
+            {"wallet_id": second, "operation_type": "DEPOSIT", "amount": 1},
+        ]
+    }
+    backward = {
+        "operations": [
+            {"wallet_id": second, "operation_type": "DEPOSIT", "amount": 1},
+            {"wallet_id": first, "operation_type": "DEPOSIT", "amount": 1},
+        ]
+    }
+
+    responses = await asyncio.gather(
+        *[
+            wallet_manager.post_wallets_operations_batch(json=payload)
+            for _ in range(10)
+            for payload in (forward, backward)
+        ]
+    )
+
+    assert all(r.status_code == 200 for r in responses)
+    assert await _balance(wallet_manager, first) == 30
+    assert await _balance(wallet_manager, second) == 30
+
+
+async def test_batch_empty(wallet_manager):
+    """Негативная проверка: пустой пакет"""
+
+    response = await wallet_manager.post_wallets_operations_batch(
+        json={"operations": []}
+    )
+
+    assert response.status_code == 422
@@ -0,0 +1,222 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from database.models.operation import Operation
+from database.queries.operation import create_operation_partitions
+from settings import settings
+from sqlalchemy import delete, insert, select, text
+from test_services.manager import WalletManager
+
+
+@pytest.fixture
+async def wallet_manager(client):
+    return WalletManager(client)
+
+
+async def read_history(wallet_manager, wallet_id: str, limit: int) -> list:
+    """Вся история кошелька, страница за страницей"""
+
+    items, params = [], {"limit": limit}
+    while True:
+        response = await wallet_manager.get_wallet_operations(wallet_id, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= limit
+        items.extend(page["items"])
+        if page["next_cursor"] is None:
+            return items
+        params = {"limit": limit, "cursor": page["next_cursor"]}
+
+
+async def test_operations_are_logged(wallet_manager):
+    """Позитивная проверка: каждая операция попадает в историю с балансом после неё"""
+
+    response = await wallet_manager.post_wallets_bulk(json={"balances": [100, 0]})
+    wallet_id, other_id = [wallet["wallet_id"] for wallet in response.json()]
+    await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "DEPOSIT", "amount": 50}
+    )
+    await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "WITHDRAW", "amount": 30}
+    )
+    await wallet_manager.post_wallets_operations_batch(
+        json={
+            "operations": [
+                {"wallet_id": wallet_id, "operation_type": "DEPOSIT", "amount": 5},
+                {"wallet_id": other_id, "operation_type": "DEPOSIT", "amount": 7},
+            ]
+        }
+    )
+
+    response = await wallet_manager.get_wallet_operations(wallet_id)
+
+    assert response.status_code == 200
+    page = response.json()
+    assert page["next_cursor"] is None
+    assert [
+        (item["operation_type"], item["amount"], item["balance"])
+        for item in page["items"]
+    ] == [("DEPOSIT", 5, 125), ("WITHDRAW", 30, 120), ("DEPOSIT", 50, 150)]
+    response = await wallet_manager.get_wallet_operations(other_id)
+    assert [item["balance"] for item in response.json()["items"]] == [7]
+
+
+async def test_idempotent_replay_is_logged_once(wallet_manager):
+    """Позитивная проверка: повтор запроса с тем же ключом не дублирует запись"""
+
+    response = await wallet_manager.post_wallets_bulk(json={"balances": [10]})
+    wallet_id = response.json()[0]["wallet_id"]
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    for _ in range(2):
+        response = await wallet_manager.post_wallet_operation(
+            wallet_id,
+            json={"operation_type": "DEPOSIT", "amount": 1},
+            headers=headers,
+        )
+        assert response.status_code == 200
+
+    response = await wallet_manager.get_wallet_operations(wallet_id)
+
+    assert len(response.json()["items"]) == 1
+
+
+async def test_history_pages(wallet_manager):
+    """Позитивная проверка: страницы по курсору без пропусков и повторов"""
+
+    response = await wallet_manager.post_wallets(json={})
+    wallet_id = response.json()["wallet_id"]
+    for amount in range(1, 8):
+        await wallet_manager.post_wallet_operation(
+            wallet_id, json={"operation_type": "DEPOSIT", "amount": amount}
+        )
+
+    items = await read_history(wallet_manager, wallet_id, limit=3)
+
+    assert [item["amount"] for item in items] == list(range(7, 0, -1))
+    assert len({item["id"] for item in items}) == 7
+
+
+async def test_failed_operation_is_not_logged(wallet_manager):
+    """Негативная проверка: отклонённое списание не попадает в историю"""
+
+    response = await wallet_manager.post_wallets_bulk(json={"balances": [10]})
+    wallet_id = response.json()[0]["wallet_id"]
+
+    response = await wallet_manager.post_wallet_operation(
+        wallet_id, json={"operation_type": "WITHDRAW", "amount": 11}
+    )
+
+    assert response.status_code == 400
+    response = await wallet_manager.get_wallet_operations(wallet_id)
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "next_cursor": None}
+
+
+async def test_unknown_wallet(wallet_manager):
+    """Негативная проверка: история несуществующего кошелька"""
+
+    response = await wallet_manager.get_wallet_operations(str(uuid.uuid4()))
+
+    assert response.status_code == 404
+
+
+async def test_invalid_cursor(wallet_manager):
+    """Негативная проверка: испорченный курсор"""
+
+    response = await wallet_manager.post_wallets(json={})
+    wallet_id = response.json()["wallet_id"]
+
+    response = await wallet_manager.get_wallet_operations(
+        wallet_id, params={"cursor": "not-a-cursor"}
+    )
+
+    assert response.status_code == 400
+
+
+async def test_partitions_ahead(session_factory):
+    """Позитивная проверка: секции на месяцы вперёд создаются повторно без ошибок"""
+
+    async with session_factory() as session:
+        await create_operation_partitions(session)
+        result = await session.execute(
+            text(
+                "SELECT count(*) FROM pg_inherits "
+                "WHERE inhparent = 'wallet_operations'::regclass"
+            )
+        )
+        partitions = result.scalar()
+
+    # Текущий месяц, месяцы вперёд и секция по умолчанию
+    assert partitions >= settings.operations_partitions_ahead + 2
+
+
+async def test_partition_over_default_rows(session_factory, monkeypatch):
+    """Позитивная проверка: строки месяца переносятся из секции по умолчанию"""
+
+    now = datetime.now(timezone.utc)
+    months = now.month - 1 + settings.operations_partitions_ahead + 2
+    later = datetime(now.year + months // 12, months % 12 + 1, 1, tzinfo=timezone.utc)
+    far = later.replace(year=later.year + 50)
+    wallet_uuid = uuid.uuid4()
+    table = Operation.__table__
+
+    async with session_factory() as session:
+        async with session.begin():
+            await session.execute(
+                insert(table),
+                [
+                    {
+                        "wallet_uuid": wallet_uuid,
+                        "created_at": created_at,
+                        "operation_type": "DEPOSIT",
+                        "amount": 1,
+                        "balance": 1,
+                    }
+                    for created_at in (later, far)
+                ],
+            )
+
+        monkeypatch.setattr(
+            settings,
+            "operations_partitions_ahead",
+            settings.operations_partitions_ahead + 2,
+        )
+        default_rows = await create_operation_partitions(session)
+
+        async with session.begin():
+            result = await session.execute(
+                select(text("tableoid::regclass::text"), table.c.created_at)
+                .where(table.c.wallet_uuid == wallet_uuid)
+                .order_by(table.c.created_at)
+            )
+            partitions = [row[0] for row in result]
+            await session.execute(
+                delete(table).where(table.c.wallet_uuid == wallet_uuid)
+            )
+
+    assert default_rows >= 1
+    assert partitions == [
+        f"wallet_operations_{later:%Y_%m}",
+        "wallet_operations_default",
+    ]
+
+
+async def test_max_batch_is_logged(wallet_manager):
+    """Позитивная проверка: пакет максимального размера целиком попадает в журнал"""
+
+    response = await wallet_manager.post_wallets_bulk(json={"count": 2})
+    wallet_ids = [wallet["wallet_id"] for wallet in response.json()]
+    operations = [
+        {"wallet_id": wallet_ids[i % 2], "operation_type": "DEPOSIT", "amount": 1}
+        for i in range(10_000)
+    ]
+
+    response = await wallet_manager.post_wallets_operations_batch(
+        json={"operations": operations}
+    )
+
+    assert response.status_code == 200
+    for wallet_id in wallet_ids:
+        items = await read_history(wallet_manager, wallet_id, limit=1000)
+        assert [item["balance"] for item in items] == list(range(5_000, 0, -1))
@@ -0,0 +1,95 @@
+import json
+import warnings
+from pathlib import Path
+from typing import Optional
+
+from test_services.stats import percentile
+
+
+class ThroughputGate:
+    """
+    Пропускная способность и p99 сценариев highload в сравнении с базовой
+    линией: сценарий не проходит, если ops/sec упали больше чем на
+    tolerance или p99 вырос больше чем на latency_tolerance (доли).
+    Сценарии без базовой линии только записываются, с предупреждением.
+
+    Базовые линии в файле лежат по профилям машины (HIGHLOAD_PROFILE):
+    абсолютные ops/sec и p99 с одной машины ничего не говорят о другой.
+    Профиль default снят на медленной машине и ловит только грубые
+    регрессии там, где своего профиля нет.
+    """
+
+    DEFAULT_PROFILE = "default"
+
+    def __init__(
+        self,
+        baseline: dict[str, dict[str, float]],
+        tolerance: float,
+        latency_tolerance: float,
+    ):
+        self.baseline = baseline
+        self.tolerance = tolerance
+        self.latency_tolerance = latency_tolerance
+        self.results: dict[str, dict[str, float]] = {}
+
+    @classmethod
+    def from_file(
+        cls,
+        path: Path,
+        profile: Optional[str],
+        tolerance: float,
+        latency_tolerance: float,
+    ) -> "ThroughputGate":
+        """Без профиля берётся базовая линия профиля default"""
+
+        profiles = json.loads(path.read_text()) if path.exists() else {}
+        baseline = profiles.get(profile or cls.DEFAULT_PROFILE, {})
+        return cls(baseline, tolerance, latency_tolerance)
+
+    def record(
+        self, scenario: str, latencies: list[float], elapsed: float
+    ) -> dict[str, float]:
+        result = {
+            "requests": len(latencies),
+            "ops_per_sec": round(len(latencies) / elapsed, 1),
+            "p99_ms": round(percentile(sorted(latencies), 99) * 1000, 1),
+        }
+        self.results[scenario] = result
+        return result
+
+    def check(self, scenario: str, latencies: list[float], elapsed: float) -> list[str]:
+        """Записывает результат сценария и возвращает найденные регрессии"""
+
+        result = self.record(scenario, latencies, elapsed)
+        baseline: Optional[dict[str, float]] = self.baseline.get(scenario)
+        if baseline is None:
+            warnings.warn(
+                f"{scenario}: нет базовой линии для этой машины, "
+                "сравнение не выполняется"
+            )
+            return []
+
+        regressions = []
+        min_ops = baseline["ops_per_sec"] * (1 - self.tolerance)
+        if result["ops_per_sec"] < min_ops:
+            regressions.append(
+                f"{scenario}: {result['ops_per_sec']} ops/sec, "
+                f"базовая линия {baseline['ops_per_sec']}, минимум {min_ops:.1f}"
+            )
+        max_p99 = baseline["p99_ms"] * (1 + self.latency_tolerance)
+        if result["p99_ms"] > max_p99:
+            regressions.append(
+                f"{scenario}: p99 {result['p99_ms']} мс, "
+                f"базовая линия {baseline['p99_ms']}, максимум {max_p99:.1f}"
+            )
+        return regressions
+
+    def write(self, path: Path) -> None:
+        path.write_text(json.dumps(self.results, indent=2, sort_keys=True) + "\n")
+
+    def update_baseline(self, path: Path, profile: Optional[str]) -> None:
+        """Результаты этого прогона становятся базовой линией профиля"""
+
+        profiles = json.loads(path.read_text()) if path.exists() else {}
+        profiles.setdefault(profile or self.DEFAULT_PROFILE, {}).update(self.results)
+        path.write_text(json.dumps(profiles, indent=2, sort_keys=True) + "\n")